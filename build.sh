@@ -5,9 +5,17 @@ set -o errexit
 # Install Python dependencies
 pip install -r requirements.txt
 
+# Recompress bundled images into AVIF/WebP variants (unchanged ones are skipped)
+python manage.py optimize_images
+
+# Refuse to deploy settings the site cannot run correctly with
+python manage.py check --deploy --fail-level ERROR
+
 # Collect static files
 python manage.py collectstatic --no-input
 
 # Run migrations (automatically runs on every deploy)
 python manage.py migrate --no-input
 
+# Prebuild the chat assistant's search index so workers start warm
+python manage.py build_chat_index
@@ -14,3 +14,14 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'econest.settings')
 
 application = get_asgi_application()
+
+# Probe the database schema once per worker process instead of per request.
+from main.readiness import warm_up  # noqa: E402
+
+warm_up()
+
+# Flush queued bookings in the background, replaying any left by a crashed
+# worker (a no-op unless BOOKING_QUEUE is on)
+from main import booking_queue  # noqa: E402
+
+booking_queue.start()
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 
+import dj_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,6 +30,10 @@ DEBUG = os.environ.get('DEBUG', 'False') == 'True'
 
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '*').split(',')
 
+# Route public pages and the chat API to async views (set when serving
+# econest.asgi through uvicorn workers; see gunicorn.conf.py)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
 
 # Application definition
 
@@ -44,7 +50,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'main.middleware.AsyncWhiteNoiseMiddleware',
+    'main.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -75,14 +82,94 @@ WSGI_APPLICATION = 'econest.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# DATABASE_URL (e.g. Render's postgres://... URL) selects the database, the
+# local SQLite file otherwise. Connections are kept open between requests
+# for DATABASE_CONN_MAX_AGE seconds and health-checked before reuse.
+#
+# DATABASE_POOL=True swaps persistent connections for a psycopg connection
+# pool per process (Postgres only; needs psycopg 3 with psycopg-pool). Each
+# pool holds as many connections as the process serves requests at once,
+# WEB_THREADS (gunicorn.conf.py reads the same variables), capped so that
+# WEB_CONCURRENCY pools fit in DATABASE_MAX_CONNECTIONS when that is set.
+# DATABASE_POOL_SIZE overrides the derived size, e.g. for ASGI workers.
+
+# Worker processes. Cached pages and blog posts, the service catalogue,
+# rate-limit buckets and the chat index version all live in the default
+# cache, and with per-process memory caches an edit would only invalidate
+# the worker that handled it. More than one worker therefore needs the
+# shared Redis cache (REDIS_URL); without it one worker is run, and
+# ``manage.py check --deploy`` fails if more are asked for (see main.checks).
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '2' if os.environ.get('REDIS_URL') else '1'))
+WEB_THREADS = int(os.environ.get('WEB_THREADS', '1'))
+
+# Seconds a connection is kept open for reuse by later requests. Under
+# ASYNC_VIEWS sync database calls run on whichever thread-pool thread is
+# free, and a persistent connection would stay open on each of them, so
+# connections are closed at the end of every request there instead (the
+# Postgres pool below reuses them).
+DATABASE_CONN_MAX_AGE = 0 if ASYNC_VIEWS else int(os.environ.get('DATABASE_CONN_MAX_AGE', '600'))
 
 DATABASES = {
+    'default': dj_database_url.config(
+        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+    )
+}
+
+if (os.environ.get('DATABASE_POOL', 'False') == 'True'
+        and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'):
+    DATABASE_POOL_SIZE = WEB_THREADS
+    if os.environ.get('DATABASE_MAX_CONNECTIONS'):
+        DATABASE_POOL_SIZE = min(DATABASE_POOL_SIZE, int(os.environ['DATABASE_MAX_CONNECTIONS']) // WEB_CONCURRENCY)
+    DATABASE_POOL_SIZE = max(1, int(os.environ.get('DATABASE_POOL_SIZE', DATABASE_POOL_SIZE)))
+    # Pooled connections go back to the pool after each request instead
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': 1,
+        'max_size': DATABASE_POOL_SIZE,
+        'timeout': 10,
+    }
+
+# Read replicas: DATABASE_REPLICA_URLS is a comma-separated list of database
+# URLs, configured as aliases replica1, replica2, ... Reads of the site's
+# own tables are spread over them and writes go to default (see
+# main.routers); a client reads from default for DATABASE_REPLICA_PIN_SECONDS
+# after it writes. To try it locally, point DATABASE_URL and
+# DATABASE_REPLICA_URLS at two SQLite files and migrate both aliases.
+
+DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = dj_database_url.parse(
+        url.strip(),
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+        test_options={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['main.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# Per-process memory cache by default, which is only correct for a single
+# worker process. REDIS_URL switches to Redis, shared between workers and
+# required for WEB_CONCURRENCY > 1.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'econest',
     }
 }
 
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -137,3 +224,85 @@ CSRF_TRUSTED_ORIGINS = [
     "https://*.onrender.com"
 ]
 
+# Seconds between schema readiness re-probes while migrations are pending
+SCHEMA_READINESS_RETRY = int(os.environ.get('SCHEMA_READINESS_RETRY', '5'))
+
+
+# Dashboard consultation table: rows per page, largest ?per_page= allowed,
+# and the point at which filtered result counts are reported as "N+"
+DASHBOARD_PAGE_SIZE = 25
+DASHBOARD_MAX_PAGE_SIZE = 200
+DASHBOARD_COUNT_CAP = 1000
+
+# Seconds the cached dashboard totals live before being recounted
+STATS_CACHE_TIMEOUT = 300
+
+# Seconds the merged service dropdown list is cached between invalidations
+CATALOGUE_CACHE_TIMEOUT = 3600
+
+# Distinct normalised chat messages whose encoded answers are kept per process
+CHAT_RESPONSE_CACHE_SIZE = 2048
+
+# Chat assistant content search: snippets per answer, where the prebuilt
+# index is snapshotted for warm starts, and seconds between checks for
+# content changed by other processes
+CHAT_SNIPPET_COUNT = 3
+CHAT_INDEX_SNAPSHOT = os.environ.get('CHAT_INDEX_SNAPSHOT', os.path.join(BASE_DIR, 'var', 'chat-index.pickle'))
+CHAT_INDEX_CHECK_INTERVAL = 30
+
+# Rate limiting of the chat API and contact form (see main.ratelimit).
+# RATELIMIT_PROXY_COUNT is the number of reverse proxies appending to
+# X-Forwarded-For, so clients are told apart rather than all sharing the
+# proxy's address. It defaults to 1 on Render (which sets RENDER) and 0
+# elsewhere.
+RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True') == 'True'
+RATELIMIT_PROXY_COUNT = int(os.environ.get('RATELIMIT_PROXY_COUNT', '1' if os.environ.get('RENDER') else '0'))
+
+# Widths (px) of the WebP/JPEG variants made for uploaded images, and the
+# background threads per process that generate them
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280]
+IMAGE_VARIANT_WORKERS = 2
+
+# Widths (px) of the resized variants made for the bundled static images
+# by manage.py optimize_images
+STATIC_IMAGE_WIDTHS = [480, 960, 1600]
+
+# Photos per gallery page, server-rendered and per infinite-scroll fetch
+GALLERY_PAGE_SIZE = 24
+
+# Posts per blog list page
+BLOG_PAGE_SIZE = 10
+
+# Seconds a rendered page stays cached (edits invalidate it straight away),
+# seconds browsers may reuse a marketing page before revalidating, and the
+# release tag in every page key so a deploy never serves the previous
+# release's templates (Render sets RENDER_GIT_COMMIT)
+PAGE_CACHE_TIMEOUT = 86400
+PAGE_MAX_AGE = 300
+PAGE_CACHE_RELEASE = os.environ.get('RENDER_GIT_COMMIT', 'dev')[:12]
+
+# PRAGMAs applied to every SQLite connection (see main.sqlite): write-ahead
+# logging, ms to wait for the write lock, fsync only at checkpoints, and
+# bytes memory-mapped / KiB (negative) of page cache per connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000')),
+    'synchronous': 'normal',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16000,
+}
+
+# Write-behind bookings (see main.booking_queue): with BOOKING_QUEUE=True
+# contact-form bookings are journalled to BOOKING_QUEUE_DIR (use a
+# persistent disk) and inserted by a background flusher in batches of
+# BOOKING_QUEUE_BATCH_SIZE, at least every BOOKING_QUEUE_FLUSH_INTERVAL seconds
+BOOKING_QUEUE = os.environ.get('BOOKING_QUEUE', 'False') == 'True'
+BOOKING_QUEUE_DIR = os.environ.get('BOOKING_QUEUE_DIR', os.path.join(BASE_DIR, 'var', 'booking-queue'))
+BOOKING_QUEUE_BATCH_SIZE = 100
+BOOKING_QUEUE_FLUSH_INTERVAL = 0.5
+
+# Idempotency keys on booking submissions (see main.idempotency): seconds a
+# completed booking's response is kept for replay, and seconds a duplicate
+# waits for the original request still in flight
+IDEMPOTENCY_KEY_TIMEOUT = 86400
+IDEMPOTENCY_WAIT = 5
@@ -0,0 +1,31 @@
+"""Gunicorn settings (picked up automatically from the working directory).
+
+By default the WSGI app runs on sync workers. With ASYNC_VIEWS=True the
+ASGI app runs on uvicorn workers instead, so each process serves many
+concurrent chat and page requests on one event loop.
+"""
+import os
+
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+
+if ASYNC_VIEWS:
+    wsgi_app = 'econest.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'econest.wsgi:application'
+
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+# Several workers need REDIS_URL for a shared cache (main.checks), so one
+# worker is the default without
+workers = int(os.environ.get('WEB_CONCURRENCY', '2' if os.environ.get('REDIS_URL') else '1'))
+# More than one thread runs sync workers as gthread; settings.py sizes the
+# database connection pool from the same two variables
+threads = int(os.environ.get('WEB_THREADS', '1'))
+
+
+def on_starting(server):
+    if workers > 1 and not os.environ.get('REDIS_URL'):
+        server.log.error(
+            "WEB_CONCURRENCY=%s without REDIS_URL: each worker has its own cache, so pages, "
+            "the service catalogue and rate limits go stale between them", workers,
+        )
@@ -3,10 +3,11 @@ from .models import Consultation, Service, GalleryImage, BlogPost
 
 @admin.register(Consultation)
 class ConsultationAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'phone', 'service', 'appointment_date', 'submitted_at')
+    list_display = ('name', 'email', 'phone', 'service', 'appointment_date', 'submitted_at', 'reference')
     list_filter = ('service', 'appointment_date', 'submitted_at')
-    search_fields = ('name', 'email', 'phone', 'service')
-    readonly_fields = ('submitted_at',)
+    search_fields = ('name', 'email', 'phone', 'service__title', 'reference')
+    list_select_related = ('service',)
+    readonly_fields = ('submitted_at', 'reference')
     date_hierarchy = 'submitted_at'
     ordering = ('-submitted_at',)
     
@@ -15,13 +16,14 @@ class ConsultationAdmin(admin.ModelAdmin):
             'fields': ('name', 'email', 'phone')
         }),
         ('Consultation Details', {
-            'fields': ('service', 'appointment_date', 'submitted_at')
+            'fields': ('service', 'appointment_date', 'submitted_at', 'reference')
         }),
     )
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
-    list_display = ('title', 'description_preview')
+    list_display = ('title', 'description_preview', 'listed')
+    list_filter = ('listed',)
     search_fields = ('title', 'description')
     
     def description_preview(self, obj):
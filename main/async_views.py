@@ -0,0 +1,55 @@
+"""Async variants of the public read paths, routed when ASYNC_VIEWS is on.
+
+Under an ASGI server these run on the event loop without a thread per
+request. ``home``, ``about`` and ``services`` are served from the page
+cache through the cache's async API. When its cached page has expired,
+``services`` reads through the async ORM and renders on a worker thread.
+The contact page, which reads the service catalogue, and ``chat_ai``,
+whose rate limiter and search index check talk to the cache and the
+database, are handed to the sync views on a worker thread; only a chat
+answer's event stream is then written from the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render
+
+from . import pages, views
+from .models import Service
+
+
+@pages.cached_page()
+async def home(request):
+    return render(request, 'main/index.html')
+
+
+@pages.cached_page()
+async def about(request):
+    return render(request, 'main/about.html')
+
+
+@pages.cached_page(Service)
+async def services(request):
+    all_services = [service async for service in Service.objects.public()]
+    # Rendered on a worker thread: the service cards' {% cache %} tag uses the sync cache API
+    return await sync_to_async(render)(request, 'main/services.html', {
+        "services": all_services,
+        "services_version": await pages.afragment_version(Service),
+        "cache_timeout": settings.PAGE_CACHE_TIMEOUT,
+    })
+
+
+async def contact(request):
+    return await sync_to_async(views.contact)(request)
+
+
+async def _aiter(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def chat_ai(request):
+    response = await sync_to_async(views.chat_ai)(request)
+    if response.streaming:
+        # Hand the ASGI handler an async iterator so it streams natively
+        response.streaming_content = _aiter(response.streaming_content)
+    return response
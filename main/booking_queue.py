@@ -0,0 +1,309 @@
+"""Optional write-behind queue for contact-form bookings.
+
+With BOOKING_QUEUE=True the contact view does not insert the booking
+itself. ``enqueue`` appends it as one JSON line to this process's journal
+in BOOKING_QUEUE_DIR and fsyncs it, and the visitor is answered straight
+away with the booking's reference. A flusher thread per process then
+moves queued bookings into the Consultation table with ``bulk_create``,
+BOOKING_QUEUE_BATCH_SIZE rows per transaction, at most
+BOOKING_QUEUE_FLUSH_INTERVAL seconds after they were queued. This
+replaces many single-row write transactions competing for SQLite's write
+lock with a few large ones.
+
+Each journal ``<name>.jsonl`` has a ``<name>.offset`` file recording how
+far it has been flushed, and is flock()ed by its process for as long as
+that process lives. Journals whose lock is free belong to processes that
+exited or crashed. The flusher claims them on start-up and every
+RECOVERY_INTERVAL seconds, replays them from their offset, and deletes
+them; ``manage.py flush_booking_queue`` does the same on demand. A batch
+that was inserted but whose offset was never recorded is replayed
+safely, since bookings whose reference is already in the table are
+skipped. Bookings are stamped ``submitted_at`` when they are inserted.
+
+Bookings are validated against the model before they are queued. A batch
+the database still rejects (a service deleted in the meantime, a value too
+long for a Postgres column) is retried one booking at a time, and the
+bookings that fail on their own are appended to DEAD_LETTER in
+BOOKING_QUEUE_DIR with the error, so one bad booking cannot hold up the
+ones queued after it. Other errors (the database being down or locked)
+leave the batch queued for the next round.
+"""
+import atexit
+import base64
+import fcntl
+import glob
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, close_old_connections
+from django.utils import timezone
+
+from . import stats
+from .models import Consultation
+from .sqlite import write_transaction
+
+logger = logging.getLogger(__name__)
+
+RECOVERY_INTERVAL = 60
+
+# Not *.jsonl, which recover() would take for an orphaned journal
+DEAD_LETTER = 'dead-letter.ndjson'
+
+# Errors caused by the booking itself rather than the state of the database
+BOOKING_ERRORS = (IntegrityError, DataError, ValueError, TypeError)
+
+
+def new_reference():
+    """Booking reference shown to the visitor, e.g. ``EN-7K2M9QX4``."""
+    return 'EN-' + base64.b32encode(secrets.token_bytes(5)).decode()
+
+
+class Journal:
+    """An append-only file of queued bookings, locked by the process that owns it."""
+
+    def __init__(self, path, fd):
+        self.path = path
+        self.fd = fd
+        self.offset_path = os.path.splitext(path)[0] + '.offset'
+
+    @classmethod
+    def create(cls, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}-{secrets.token_hex(4)}.jsonl')
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return cls(path, fd)
+
+    @classmethod
+    def claim(cls, path):
+        """Lock an orphaned journal, or return None if its process is still running."""
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_APPEND)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        if not os.path.exists(path):
+            # Replayed and deleted by another process in the meantime
+            os.close(fd)
+            return None
+        return cls(path, fd)
+
+    def append(self, booking):
+        os.write(self.fd, (json.dumps(booking, cls=DjangoJSONEncoder) + '\n').encode())
+        os.fsync(self.fd)
+
+    def size(self):
+        return os.fstat(self.fd).st_size
+
+    def read_offset(self):
+        try:
+            with open(self.offset_path) as handle:
+                return int(handle.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write_offset(self, offset):
+        directory = os.path.dirname(self.path)
+        with tempfile.NamedTemporaryFile('w', dir=directory, delete=False) as handle:
+            handle.write(str(offset))
+        os.replace(handle.name, self.offset_path)
+
+    def batches(self, offset, size):
+        """``(end offset, bookings)`` for each batch of complete lines past ``offset``.
+
+        A line without its newline was cut short by a crash before the
+        booking was acknowledged, and is left out.
+        """
+        with open(self.path, 'rb') as handle:
+            handle.seek(offset)
+            data = handle.read()
+        data = data[:data.rfind(b'\n') + 1]
+        batch = []
+        for line in data.splitlines(keepends=True):
+            offset += len(line)
+            try:
+                batch.append(json.loads(line))
+            except ValueError:
+                logger.error(f"Skipping unreadable booking in {self.path} before offset {offset}")
+            if len(batch) == size:
+                yield offset, batch
+                batch = []
+        if batch:
+            yield offset, batch
+
+    def truncate(self):
+        os.ftruncate(self.fd, 0)
+        self.write_offset(0)
+
+    def delete(self):
+        for path in (self.offset_path, self.path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        os.close(self.fd)
+
+
+def validate(booking):
+    """Raise ValidationError unless ``booking`` would insert cleanly."""
+    try:
+        Consultation(**booking).full_clean(validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        raise ValidationError(e.messages)
+
+
+def dead_letter(booking, error, directory=None):
+    """Set aside a booking the database refuses, with the reason."""
+    directory = directory or settings.BOOKING_QUEUE_DIR
+    os.makedirs(directory, exist_ok=True)
+    record = {'booking': booking, 'error': f'{type(error).__name__}: {error}', 'failed_at': timezone.now()}
+    fd = os.open(os.path.join(directory, DEAD_LETTER), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, (json.dumps(record, cls=DjangoJSONEncoder) + '\n').encode())
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    logger.error(f"Booking {booking.get('reference')} could not be inserted and was dead-lettered: {str(error)}")
+
+
+def _insert(bookings):
+    references = [booking['reference'] for booking in bookings]
+    with write_transaction():
+        existing = set(Consultation.objects.filter(reference__in=references).values_list('reference', flat=True))
+        new = [Consultation(**booking) for booking in bookings if booking['reference'] not in existing]
+        Consultation.objects.bulk_create(new)
+    if new:
+        # bulk_create sends no post_save, so the dashboard total is kept here
+        stats.adjust(Consultation, len(new))
+    return len(new)
+
+
+def insert(bookings):
+    """Insert a batch of queued bookings, skipping any already inserted. Returns the count.
+
+    When the database rejects the batch, each booking is inserted on its own
+    and the ones it rejects are dead-lettered.
+    """
+    try:
+        return _insert(bookings)
+    except BOOKING_ERRORS as e:
+        if len(bookings) == 1:
+            dead_letter(bookings[0], e)
+            return 0
+        logger.error(f"Batch of {len(bookings)} queued bookings rejected, inserting one at a time: {str(e)}")
+    inserted = 0
+    for booking in bookings:
+        try:
+            inserted += _insert([booking])
+        except BOOKING_ERRORS as e:
+            dead_letter(booking, e)
+    return inserted
+
+
+def replay(journal):
+    """Insert everything in ``journal`` past its offset. Returns the number inserted."""
+    inserted = 0
+    for end, batch in journal.batches(journal.read_offset(), settings.BOOKING_QUEUE_BATCH_SIZE):
+        inserted += insert(batch)
+        journal.write_offset(end)
+    return inserted
+
+
+def recover(directory=None):
+    """Replay and delete the journals of processes that are no longer running."""
+    inserted = 0
+    for path in sorted(glob.glob(os.path.join(directory or settings.BOOKING_QUEUE_DIR, '*.jsonl'))):
+        if _journal is not None and path == _journal.path:
+            continue
+        journal = Journal.claim(path)
+        if journal is None:
+            continue
+        count = replay(journal)
+        journal.delete()
+        if count:
+            logger.warning(f"Recovered {count} queued bookings from {os.path.basename(path)}")
+        inserted += count
+    return inserted
+
+
+_lock = threading.Lock()  # appends to, and truncation of, this process's journal
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_journal = None
+_queued = 0
+_thread = None
+
+
+def enqueue(booking):
+    """Durably queue a booking (Consultation field values, with its reference).
+
+    Raises ValidationError, without queueing it, if the booking is invalid.
+    """
+    global _journal, _queued
+    validate(booking)
+    with _lock:
+        if _journal is None:
+            _journal = Journal.create(settings.BOOKING_QUEUE_DIR)
+        _journal.append(booking)
+        _queued += 1
+        full = _queued >= settings.BOOKING_QUEUE_BATCH_SIZE
+    start()
+    if full:
+        _wake.set()
+    return booking['reference']
+
+
+def flush():
+    """Insert this process's queued bookings now. Returns the number inserted."""
+    global _queued
+    with _flush_lock:
+        if _journal is None:
+            return 0
+        with _lock:
+            _queued = 0
+        inserted = replay(_journal)
+        with _lock:
+            # Nothing was appended while replaying: start the journal afresh
+            if _journal.size() == _journal.read_offset():
+                _journal.truncate()
+        return inserted
+
+
+def _run():
+    last_recovery = 0.0
+    while True:
+        _wake.wait(settings.BOOKING_QUEUE_FLUSH_INTERVAL)
+        _wake.clear()
+        close_old_connections()
+        try:
+            flush()
+            if time.monotonic() - last_recovery >= RECOVERY_INTERVAL:
+                last_recovery = time.monotonic()
+                recover()
+        except Exception as e:
+            # The bookings stay journalled and are retried on the next round
+            logger.error(f"Error flushing booking queue: {str(e)}")
+
+
+def start():
+    """Start this process's flusher (once). A no-op unless BOOKING_QUEUE is on."""
+    global _thread
+    if not settings.BOOKING_QUEUE or _thread is not None:
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='booking-queue', daemon=True)
+            _thread.start()
+            atexit.register(flush)
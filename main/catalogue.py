@@ -0,0 +1,75 @@
+"""Cached service catalogue for the booking and dashboard dropdowns.
+
+The catalogue lists every ``Service`` as ``{'id': ..., 'title': ...,
+'listed': ...}`` in the order they were added, so the services seeded by
+the migrations come first. The public booking form offers only the listed
+ones. It is built once and cached under a versioned key. Bumping the
+version (see ``main.signals``) invalidates it for every worker sharing the
+cache.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from .models import Service
+from .routers import primary
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'service-catalogue:version'
+CATALOGUE_KEY = 'service-catalogue:listed'
+
+
+def _version():
+    cache.add(VERSION_KEY, 1, None)
+    return cache.get(VERSION_KEY, 1)
+
+
+def build_service_catalogue():
+    return list(Service.objects.order_by('pk').values('id', 'title', 'listed'))
+
+
+def get_service_catalogue():
+    """Return the cached catalogue, building it on a miss.
+
+    Returns an empty catalogue (without caching it) if the database cannot
+    be read.
+    """
+    version = _version()
+    catalogue = cache.get(CATALOGUE_KEY, version=version)
+    if catalogue is None:
+        try:
+            # From the primary, as a replica may not have the change yet
+            with primary():
+                catalogue = build_service_catalogue()
+        except DatabaseError as e:
+            logger.error(f"Error getting services from database: {str(e)}")
+            return []
+        cache.set(CATALOGUE_KEY, catalogue, settings.CATALOGUE_CACHE_TIMEOUT, version=version)
+    return catalogue
+
+
+def get_listed_catalogue():
+    """The catalogue's listed services, for the public booking form."""
+    return [service for service in get_service_catalogue() if service['listed']]
+
+
+def invalidate():
+    """Move every reader on to a fresh catalogue version."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+def lookup_service(value, listed_only=False):
+    """Resolve a submitted service (primary key, or title from older forms) to a Service."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    services = Service.objects.filter(listed=True) if listed_only else Service.objects.all()
+    if value.isdigit():
+        return services.filter(pk=int(value)).first()
+    return services.filter(title=value).order_by('pk').first()
@@ -0,0 +1,305 @@
+"""Intent matching and canned answers for the chat assistant.
+
+All intents' keywords are compiled at import into one trie-shaped regex,
+so classifying a message is a single scan. Keywords match whole words (so
+"hi" does not fire inside "this"), with common English suffixes allowed on
+topic words ("materials", "booking", "designer"). When a message mentions
+keywords of several intents (say "furniture", which is both a material and
+a design word), a hashed n-gram classifier trained on ``INTENT_EXAMPLES``
+(see ``main.intents``) picks the closest of them.
+
+Questions about materials, design or anything unrecognised are answered
+with the best matching snippets from the services and blog posts (see
+``main.retrieval``), falling back to the canned answer when nothing
+matches. The JSON body and server-sent-event chunks of every canned answer
+are encoded once at import, and an LRU keyed by normalised message text and
+index generation keeps the encoded content answers.
+"""
+import json
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import retrieval
+from .intents import HashedNgramClassifier
+
+INTENT_KEYWORDS = {
+    'greeting': ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'],
+    'eco_materials': ['material', 'eco', 'sustainable', 'green', 'environment', 'recycled', 'bamboo', 'cork', 'wood', 'furniture'],
+    'services': ['service', 'what do you', 'offer', 'provide', 'help', 'can you', 'do you'],
+    'booking': ['book', 'consultation', 'appointment', 'schedule', 'meeting', 'available'],
+    'design': ['design', 'interior', 'decor', 'style', 'color', 'room', 'space', 'layout', 'furniture', 'arrangement'],
+}
+
+# Greetings must match exactly; topic words may carry an inflection
+EXACT_INTENTS = {'greeting'}
+SUFFIXES = 's|es|ed|er|ers|ing|al|ally|ly|ity'
+
+# Typical messages per intent, used with the keywords to train the classifier
+INTENT_EXAMPLES = {
+    'greeting': [
+        'hi there', 'hello!', 'hey, anyone around?', 'good morning', 'good evening, hope you are well',
+    ],
+    'eco_materials': [
+        'what eco-friendly materials do you recommend',
+        'is bamboo or cork better for flooring',
+        'do you use reclaimed wood for furniture',
+        'which paints are non-toxic and low VOC',
+        'sustainable materials for a kitchen renovation',
+        'is recycled furniture durable',
+        'natural fibre upholstery options',
+        'what materials do you use',
+        'which woods do you work with',
+    ],
+    'services': [
+        'what services do you offer',
+        'what do you provide',
+        'can you help with a full renovation',
+        'do you make custom furniture',
+        'do you do indoor plant installations',
+        'what kind of projects do you take on',
+    ],
+    'booking': [
+        'how do I book a consultation',
+        'can I schedule an appointment',
+        'are you available next week for a meeting',
+        'I would like to book a session',
+        'when is your next available slot',
+    ],
+    'design': [
+        'how should I arrange furniture in a small living room',
+        'colour ideas for a bedroom',
+        'design tips for an open plan space',
+        'what decor style suits a north-facing room',
+        'layout ideas for a home office',
+        'how can I make my room feel bigger',
+    ],
+}
+
+FALLBACK_INTENT = 'fallback'
+
+# Intents answered from site content when it has a match
+RETRIEVAL_INTENTS = {'eco_materials', 'design', FALLBACK_INTENT}
+
+RESPONSES = {
+    'greeting': "Hello! I'm your virtual design assistant at EcoNest Interiors. I can help you with interior design queries, suggest eco-friendly materials, explain our services, and guide you to book a consultation. How can I assist you today?",
+    'eco_materials': """Great question! Here are some excellent eco-friendly materials we recommend:
+
+🌿 **Sustainable Flooring:**
+- Bamboo (fast-growing, renewable)
+- Cork (harvested without harming trees)
+- Reclaimed wood (recycled from old structures)
+- Linoleum (made from natural materials)
+
+🪑 **Eco-Friendly Furniture:**
+- FSC-certified wood (sustainably sourced)
+- Recycled metal furniture
+- Furniture made from reclaimed materials
+- Natural fiber upholstery (organic cotton, hemp, jute)
+
+🎨 **Sustainable Paints & Finishes:**
+- Low-VOC or zero-VOC paints
+- Natural clay paints
+- Milk paint (non-toxic, biodegradable)
+
+Would you like more details about any specific material, or would you like to book a consultation to discuss your project?""",
+    'services': """We offer comprehensive eco-friendly interior design services:
+
+✨ **Interior Design Consultation**
+Personalized sessions to align your home with sustainable living principles.
+
+🪑 **Custom Eco-Friendly Furniture**
+Handcrafted pieces using sustainable materials and finishes, tailored to your space.
+
+🏠 **Renovation with Sustainable Materials**
+Upgrade your home with eco-friendly flooring, paints, and fixtures.
+
+🌱 **Green Spaces & Indoor Plants**
+Enhancing interiors with biophilic designs and indoor gardens for better air quality.
+
+Would you like to learn more about any specific service, or book a consultation?""",
+    'booking': """I'd be happy to help you book a consultation! 
+
+To schedule your appointment, please:
+1. Visit our "Book Consultation" page (click the link in the navigation or chat)
+2. Fill out the form with your details
+3. Select your preferred service and date
+
+You can also call us at +91 6301739482 or email harshithatiruveedula@gmail.com
+
+Would you like me to guide you through the booking process?""",
+    'design': """I'd love to help with your interior design questions! 
+
+Here are some sustainable design tips:
+- **Maximize Natural Light**: Reduces energy consumption and creates a welcoming atmosphere
+- **Choose Sustainable Materials**: Opt for bamboo, cork, reclaimed wood, and natural fibers
+- **Incorporate Plants**: Indoor plants improve air quality and add natural beauty
+- **Energy-Efficient Lighting**: Use LED bulbs and maximize daylight
+- **Multi-functional Furniture**: Reduces waste and maximizes space efficiency
+
+For personalized design advice tailored to your specific space and needs, I recommend booking a consultation with our design experts. Would you like to schedule one?""",
+    FALLBACK_INTENT: """I'm here to help you with:
+- Interior design advice and tips
+- Eco-friendly material suggestions
+- Information about our services
+- Booking consultations
+
+Could you please rephrase your question? Or feel free to ask about:
+- "What eco-friendly materials do you recommend?"
+- "What services do you offer?"
+- "How can I book a consultation?"
+- "Design tips for my home"
+
+I'm here to assist you! 😊""",
+}
+
+
+def _trie_pattern(words):
+    """Regex alternation for ``words`` factored into a prefix trie.
+
+    Sharing prefixes ("de(?:cor|sign)") keeps the regex engine from retrying
+    every keyword at every position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie).replace(re.escape(' '), r'\s+')
+
+
+def compile_matcher(intent_keywords=INTENT_KEYWORDS):
+    """Compile every keyword into one regex and a keyword -> intents table.
+
+    Group 1 is the keyword, group 2 any inflection suffix.
+    """
+    lookup = {}
+    for intent, keywords in intent_keywords.items():
+        for keyword in keywords:
+            lookup[keyword] = lookup.get(keyword, ()) + (intent,)
+    pattern = re.compile(rf'\b({_trie_pattern(lookup)})({SUFFIXES})?\b')
+    return pattern, lookup
+
+
+INTENT_PATTERN, KEYWORD_INTENTS = compile_matcher()
+_WHITESPACE = re.compile(r'\s+')
+
+
+CLASSIFIER = HashedNgramClassifier().fit({
+    intent: INTENT_KEYWORDS[intent] + INTENT_EXAMPLES[intent] for intent in INTENT_KEYWORDS
+})
+
+
+def matched_intents(message):
+    """Intents with a keyword in the lower-cased ``message``."""
+    found = set()
+    for keyword, suffix in INTENT_PATTERN.findall(message):
+        for intent in KEYWORD_INTENTS.get(keyword) or KEYWORD_INTENTS[_WHITESPACE.sub(' ', keyword)]:
+            if not (suffix and intent in EXACT_INTENTS):
+                found.add(intent)
+    return found
+
+
+def classify_intent(message):
+    """Return the intent of ``message``, ranking overlapping keyword matches with the classifier."""
+    message = message.lower()
+    candidates = matched_intents(message)
+    if not candidates:
+        return FALLBACK_INTENT
+    if len(candidates) == 1:
+        return next(iter(candidates))
+    return CLASSIFIER.classify(message, candidates)
+
+
+def classify_intents(messages):
+    """Batch classify_intent(): ambiguous messages are scored in one matrix product."""
+    messages = [message.lower() for message in messages]
+    results = []
+    ambiguous, candidates = [], []
+    for position, message in enumerate(messages):
+        found = matched_intents(message)
+        if len(found) > 1:
+            ambiguous.append(position)
+            candidates.append(found)
+        results.append(next(iter(found)) if len(found) == 1 else FALLBACK_INTENT)
+    if ambiguous:
+        predicted = CLASSIFIER.predict([messages[position] for position in ambiguous], candidates)
+        for position, intent in zip(ambiguous, predicted):
+            results[position] = intent
+    return results
+
+
+def generate_ai_response(user_message):
+    """Generate AI response based on user query"""
+    return RESPONSES[classify_intent(user_message)]
+
+
+def _encode(text):
+    """Serialise an answer exactly as JsonResponse would."""
+    return json.dumps({'response': text, 'success': True}, cls=DjangoJSONEncoder).encode()
+
+
+def _event(data, event=None):
+    """One server-sent event carrying ``data`` as JSON."""
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return (f'event: {event}\n' if event else '').encode() + f'data: {payload}\n\n'.encode()
+
+
+def _encode_stream(text):
+    """Split an answer into line-sized server-sent events, ending with a ``done`` event."""
+    chunks = re.split(r'(?<=\n)', text)
+    return [_event({'chunk': chunk}) for chunk in chunks if chunk] + [_event({'success': True}, 'done')]
+
+
+ENCODED_RESPONSES = {intent: _encode(text) for intent, text in RESPONSES.items()}
+ENCODED_STREAMS = {intent: _encode_stream(text) for intent, text in RESPONSES.items()}
+
+
+def compose_answer(hits):
+    """Answer text quoting the best snippet from each hit."""
+    parts = ["Here's what I found on EcoNest Interiors:"]
+    for hit in hits:
+        part = f"**{hit.title}**\n{hit.snippet}"
+        if hit.url:
+            part += f"\n[Read more]({hit.url})"
+        parts.append(part)
+    parts.append("Would you like to book a consultation to discuss your project?")
+    return '\n\n'.join(parts)
+
+
+def normalize_message(message):
+    """Lower-case and collapse whitespace so trivially different messages share a cache slot."""
+    return _WHITESPACE.sub(' ', message.lower()).strip()
+
+
+@lru_cache(maxsize=settings.CHAT_RESPONSE_CACHE_SIZE)
+def _encoded_answer(message, generation):
+    """``(body, events)`` for a normalised message and index generation."""
+    intent = classify_intent(message)
+    if intent in RETRIEVAL_INTENTS:
+        hits = retrieval.search(message)
+        if hits:
+            text = compose_answer(hits)
+            return _encode(text), _encode_stream(text)
+    return ENCODED_RESPONSES[intent], ENCODED_STREAMS[intent]
+
+
+def encoded_response(message):
+    """Pre-encoded JSON body for a normalised message."""
+    return _encoded_answer(message, retrieval.generation())[0]
+
+
+def encoded_stream(message):
+    """Pre-encoded server-sent events for a normalised message."""
+    return _encoded_answer(message, retrieval.generation())[1]
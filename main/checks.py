@@ -0,0 +1,21 @@
+"""System checks for deployment settings, run by ``manage.py check --deploy``."""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """More than one worker needs a cache they share, or invalidation misses the others."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.WEB_CONCURRENCY > 1 and backend in LOCAL_CACHES:
+        return [Error(
+            f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY} with a per-process cache ({backend}).",
+            hint="Set REDIS_URL for a shared cache, or run one worker.",
+            id='main.E001',
+        )]
+    return []
@@ -0,0 +1,231 @@
+"""Idempotency keys for booking submissions.
+
+A client sends a fresh random key with each booking it makes, in an
+``Idempotency-Key`` header or an ``idempotency_key`` form field (rendered
+by ``{% idempotency_key_field %}``), and sends the same key again when it
+retries that booking. The first request with a key claims it by inserting
+an ``IdempotencyKey`` row; the unique constraint on (scope, key) lets only
+one request, in any worker, win. That request runs the view. If the
+submission went through, answered with a redirect or a JSON response below
+400, the response is stored on the row for IDEMPOTENCY_KEY_TIMEOUT
+seconds. Later requests with the key get it back, marked
+``Idempotent-Replayed: true``, without running the view, so a double click
+or a retry after a timeout never books twice.
+
+A known key is looked up, read-only, before the optional ``limit``
+decorator (normally a ``rate_limit``) runs, and the key is only claimed
+once the limiter has let the request through. Retries are therefore never
+rate-limited, and a rejected request writes nothing.
+
+While the first request is still running, a duplicate waits up to
+IDEMPOTENCY_WAIT seconds for its response, then gets a 409 asking it to
+retry. Errors and re-rendered forms are not stored, so the client may
+retry, or correct the form, with the same key. Reusing a key for a
+different submission is refused with a 422. A claim whose request died
+expires after PENDING_TIMEOUT seconds; expired rows are reclaimed when
+their key comes back and purged every PURGE_INTERVAL seconds.
+
+    @idempotent('contact', limit=rate_limit('contact', rate='10/h', burst=5))
+    def contact(request): ...
+"""
+import hashlib
+import logging
+import time
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+from .sqlite import write_transaction
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = 255
+
+# A request that died mid-flight frees its key after this many seconds
+PENDING_TIMEOUT = 60
+POLL_INTERVAL = 0.05
+PURGE_INTERVAL = 3600
+
+# Form fields that differ between retries of the same submission
+UNSIGNED_FIELDS = {'csrfmiddlewaretoken', FIELD}
+
+_last_purge = 0.0
+
+
+def new_key():
+    return str(uuid.uuid4())
+
+
+def request_key(request):
+    return (request.headers.get(HEADER) or request.POST.get(FIELD, '')).strip()
+
+
+def fingerprint(request):
+    """Digest of the path and form data, to spot a key reused for another submission."""
+    digest = hashlib.sha256(request.path.encode())
+    for name, values in sorted(request.POST.lists()):
+        if name not in UNSIGNED_FIELDS:
+            for value in values:
+                digest.update(f'\0{name}={value}'.encode())
+    return digest.hexdigest()
+
+
+def _error(request, message, status):
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.headers.get(HEADER):
+        return JsonResponse({'success': False, 'message': message}, status=status)
+    return HttpResponse(message, status=status, content_type='text/plain')
+
+
+def completed(response):
+    """Whether ``response`` answers a submission that went through."""
+    if response.streaming:
+        return False
+    if 300 <= response.status_code < 400:
+        return True
+    return response.status_code < 300 and response.get('Content-Type', '').startswith('application/json')
+
+
+def _replay(record):
+    response = HttpResponse(bytes(record.content), status=record.status, content_type=record.content_type)
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def purge_expired():
+    """Delete expired keys, at most once per PURGE_INTERVAL per process."""
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+
+
+def claim(scope, key, digest):
+    """Insert the pending row for ``key``: ``(True, None)``, or ``(False, existing row or None)``."""
+    for _ in range(2):
+        try:
+            with write_transaction():
+                IdempotencyKey.objects.create(
+                    scope=scope, key=key, fingerprint=digest,
+                    expires_at=timezone.now() + timedelta(seconds=PENDING_TIMEOUT),
+                )
+            return True, None
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            if record is None:
+                # Released between the insert and the read: try again
+                continue
+            if record.expires_at > timezone.now():
+                return False, record
+            # Expired: reclaim it unless someone else just did
+            IdempotencyKey.objects.filter(pk=record.pk, expires_at=record.expires_at).delete()
+    return False, IdempotencyKey.objects.filter(scope=scope, key=key).first()
+
+
+def _wait(record):
+    """``record`` once its request has finished, or None if still running or released."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while record is not None and record.status is None:
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+    return record
+
+
+def _store(scope, key, response):
+    IdempotencyKey.objects.filter(scope=scope, key=key).update(
+        status=response.status_code,
+        content=response.content,
+        content_type=response.get('Content-Type', ''),
+        location=response.get('Location', ''),
+        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TIMEOUT),
+    )
+
+
+def _release(scope, key):
+    IdempotencyKey.objects.filter(scope=scope, key=key, status__isnull=True).delete()
+
+
+def _answer(request, record, digest):
+    """Response to a request whose key is already taken by ``record``."""
+    record = _wait(record)
+    if record is None:
+        # Either still in flight, or it failed and freed the key just now;
+        # the retry will tell which
+        response = _error(request, "This submission is already being processed. Please try again.", 409)
+        response['Retry-After'] = '1'
+        return response
+    if record.fingerprint != digest:
+        return _error(request, "This idempotency key was already used for a different submission.", 422)
+    return _replay(record)
+
+
+def idempotent(scope, limit=None):
+    """Run a POST view at most once per idempotency key; replay its response after that.
+
+    ``limit`` decorates the view for requests whose key is not already
+    taken, between the read-only lookup and the claim.
+    """
+
+    def decorator(view):
+        def claiming(request, key, digest, *args, **kwargs):
+            try:
+                purge_expired()
+                claimed, record = claim(scope, key, digest)
+                if not claimed:
+                    return _answer(request, record, digest)
+            except Exception as e:
+                logger.error(f"Idempotency keys unavailable: {str(e)}")
+                return view(request, *args, **kwargs)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                _release(scope, key)
+                raise
+            try:
+                if completed(response):
+                    _store(scope, key, response)
+                else:
+                    _release(scope, key)
+            except Exception as e:
+                logger.error(f"Error storing idempotent response: {str(e)}")
+            return response
+
+        guarded = limit(claiming) if limit else claiming
+        unkeyed = limit(view) if limit else view
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return unkeyed(request, *args, **kwargs)
+            key = request_key(request)
+            if not key:
+                return unkeyed(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH or not key.isprintable():
+                return _error(request, "Invalid idempotency key.", 400)
+
+            digest = fingerprint(request)
+            try:
+                record = IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__gt=timezone.now()).first()
+            except Exception as e:
+                # Without the table (schema not migrated yet) run unprotected
+                logger.error(f"Idempotency keys unavailable: {str(e)}")
+                return unkeyed(request, *args, **kwargs)
+            if record is not None:
+                return _answer(request, record, digest)
+            return guarded(request, key, digest, *args, **kwargs)
+        return wrapper
+    return decorator
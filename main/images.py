@@ -0,0 +1,158 @@
+"""Responsive width variants for uploaded images.
+
+When a GalleryImage, Service or BlogPost is saved with a new image, the
+variants are generated on a background thread pool so the admin save
+returns straight away. Each variant is stored next to the original, e.g.
+``gallery/porch.jpg`` -> ``gallery/porch.w640.webp`` and
+``gallery/porch.w640.jpg``. When they are written, the model's
+``image_variants`` records them:
+
+    {"source": "gallery/porch.jpg", "width": 4000, "height": 3000,
+     "sizes": [[320, 240], [640, 480], ...]}
+
+Until then, or if the image is replaced, templates fall back to the
+original (see the ``responsive_image`` tag). Variants of a replaced or
+removed image, or of a deleted object's image, are deleted, and the
+cached pages showing the image are retired whenever its markup changes.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+from . import pages
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'{root}.w{width}.{extension}'
+
+
+def target_widths(width):
+    """Configured widths narrower than the original, or just the original if it is smaller."""
+    return [w for w in settings.IMAGE_VARIANT_WIDTHS if w < width] or [width]
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency composited onto white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(storage, name):
+    """Write every width/format variant of ``name`` and return its image_variants record."""
+    with storage.open(name, 'rb') as handle:
+        image = Image.open(handle)
+        image = _flatten(ImageOps.exif_transpose(image))
+    width, height = image.size
+    sizes = []
+    for target in target_widths(width):
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for extension, (format, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, format, **options)
+            path = variant_name(name, target, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(buffer.getvalue()))
+        sizes.append(list(resized.size))
+    return {'source': name, 'width': width, 'height': height, 'sizes': sizes}
+
+
+def delete_variants(storage, record):
+    """Delete the variant files listed in an image_variants record."""
+    for width, _ in record.get('sizes', []):
+        for extension in FORMATS:
+            storage.delete(variant_name(record['source'], width, extension))
+
+
+def needs_variants(instance):
+    image = instance.image
+    return bool(image) and (instance.image_variants or {}).get('source') != image.name
+
+
+def stale_variants(instance):
+    """``instance``'s image_variants record if it is for an image it no longer has, else None."""
+    record = instance.image_variants or {}
+    if record.get('source') and record['source'] != instance.image.name:
+        return record
+    return None
+
+
+def _run(model, pk, name):
+    storage = model._meta.get_field('image').storage
+    try:
+        record = generate_variants(storage, name)
+        # Only record them if the image was not replaced in the meantime
+        if model.objects.filter(pk=pk, image=name).update(image_variants=record):
+            # update() sends no signals; re-render cached pages showing the image
+            pages.invalidate_image(model, pk)
+        else:
+            delete_variants(storage, record)
+    except Exception as e:
+        logger.error(f"Error generating variants for {name}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def _discard(model, pk, record):
+    storage = model._meta.get_field('image').storage
+    try:
+        # Forget the record first, unless the variants of a new image were
+        # recorded in the meantime, so no page renders the deleted files
+        model.objects.filter(pk=pk, image_variants__source=record['source']).update(image_variants={})
+        delete_variants(storage, record)
+    except Exception as e:
+        logger.error(f"Error deleting variants of {record['source']}: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix='image-variants'
+            )
+        return _executor
+
+
+def schedule(instance):
+    """Generate ``instance``'s image variants in the background."""
+    return _get_executor().submit(_run, type(instance), instance.pk, instance.image.name)
+
+
+def discard(model, pk, record):
+    """Delete the variants in ``record``, of an image ``model`` ``pk`` no longer has, in the background."""
+    return _get_executor().submit(_discard, model, pk, record)
+
+
+def srcset(image, record, extension):
+    """``srcset`` value listing ``image``'s recorded variants in one format."""
+    return ', '.join(
+        f"{image.storage.url(variant_name(record['source'], width, extension))} {width}w"
+        for width, _ in record['sizes']
+    )
@@ -0,0 +1,102 @@
+"""Hashed character n-gram intent classifier.
+
+Messages are turned into fixed-size vectors by hashing their character
+n-grams (FNV-1a, so the buckets are the same in every process and a whole
+batch is hashed in a few array operations) and counting them, weighted by
+inverse document frequency over the training examples so n-grams every
+intent shares ("what", "do you") count for little. Each intent's centroid
+is the normalised mean of its example vectors, and a batch of messages is
+scored against every centroid with one matrix product.
+"""
+import numpy as np
+
+FNV_OFFSET = np.uint32(2166136261)
+FNV_PRIME = np.uint32(16777619)
+
+
+class HashedNgramClassifier:
+    """Nearest-centroid classifier over hashed character n-grams.
+
+    ``fit`` takes ``{label: [example, ...]}``; ``scores`` returns cosine
+    similarities with columns in ``labels`` order.
+    """
+
+    def __init__(self, dimensions=4096, ngram_range=(2, 4), batch_size=256):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.batch_size = batch_size
+        self.labels = []
+        self.idf = np.ones(dimensions, dtype=np.float32)
+        self.centroids = np.zeros((0, dimensions), dtype=np.float32)
+
+    def buckets(self, messages):
+        """``(rows, buckets)`` arrays: the hash bucket of every n-gram and its message.
+
+        N-grams are taken over the UTF-8 bytes of each message, lower-cased
+        and padded with spaces, and hashed with 32-bit FNV-1a for all
+        messages at once.
+        """
+        encoded = [(' %s ' % ' '.join(message.lower().split())).encode() for message in messages]
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint32)
+        message_of = np.repeat(np.arange(len(encoded)), [len(text) for text in encoded])
+        rows, buckets = [], []
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            starts = len(data) - n + 1
+            if starts <= 0:
+                continue
+            hashes = np.full(starts, FNV_OFFSET ^ n, dtype=np.uint32)
+            for offset in range(n):
+                hashes ^= data[offset:offset + starts]
+                hashes *= FNV_PRIME
+            # Drop n-grams that run from one message into the next
+            inside = message_of[:starts] == message_of[n - 1:]
+            rows.append(message_of[:starts][inside])
+            buckets.append(hashes[inside] % self.dimensions)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(buckets).astype(np.int64)
+
+    def counts(self, messages):
+        """``(len(messages), dimensions)`` matrix of raw n-gram bucket counts."""
+        rows, buckets = self.buckets(messages)
+        counts = np.bincount(rows * self.dimensions + buckets, minlength=len(messages) * self.dimensions)
+        return counts.astype(np.float32).reshape(len(messages), self.dimensions)
+
+    def vectorize(self, messages):
+        """``(len(messages), dimensions)`` matrix of L2-normalised tf-idf vectors."""
+        matrix = self.counts(messages)
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    def fit(self, examples):
+        self.labels = list(examples)
+        every = [text for texts in examples.values() for text in texts]
+        document_frequency = np.count_nonzero(self.counts(every), axis=0)
+        self.idf = (np.log((1 + len(every)) / (1 + document_frequency)) + 1).astype(np.float32)
+        centroids = np.stack([self.vectorize(texts).mean(axis=0) for texts in examples.values()])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = np.divide(centroids, norms, out=centroids, where=norms > 0)
+        return self
+
+    def scores(self, messages):
+        """Cosine similarity of each message to each centroid, in batches."""
+        results = [
+            self.vectorize(messages[start:start + self.batch_size]) @ self.centroids.T
+            for start in range(0, len(messages), self.batch_size)
+        ]
+        if not results:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        return np.concatenate(results)
+
+    def predict(self, messages, candidates=None):
+        """Best label per message, optionally limited to a set of labels per message."""
+        scores = self.scores(messages)
+        if candidates is not None:
+            mask = np.array([[label in allowed for label in self.labels] for allowed in candidates])
+            scores = np.where(mask, scores, -np.inf)
+        return [self.labels[column] for column in scores.argmax(axis=1)]
+
+    def classify(self, message, candidates=None):
+        return self.predict([message], None if candidates is None else [candidates])[0]
@@ -0,0 +1,135 @@
+"""Load-test the sync (gunicorn sync worker) and async (uvicorn worker) deployments.
+
+Starts one single-worker gunicorn per mode on a local port using
+gunicorn.conf.py, drives it with concurrent HTTP/1.1 clients, and prints
+requests/sec and latency percentiles per path::
+
+    python manage.py bench_asgi --concurrency 100 --requests 5000
+"""
+import asyncio
+import json
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# (path, JSON body to POST or None to GET)
+PATHS = [
+    ('/api/chat/', {'message': 'what eco-friendly materials do you recommend'}),
+    ('/', None),
+]
+
+# Any 32-character token passes the CSRF check when cookie and header match
+CSRF_TOKEN = secrets.token_hex(16)
+
+MODES = {
+    'sync (wsgi)': 'False',
+    'async (asgi)': 'True',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"Server on port {port} did not start")
+
+
+def encode_request(path, body):
+    if body is None:
+        return f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode()
+    payload = json.dumps(body).encode()
+    return (
+        f'POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n'
+        f'Cookie: csrftoken={CSRF_TOKEN}\r\nX-CSRFToken: {CSRF_TOKEN}\r\n\r\n'
+    ).encode() + payload
+
+
+async def fetch(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def load(port, request, concurrency, total):
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, request)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec and p99 latency of the sync and async deployments under concurrency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per path per mode')
+
+    def handle(self, *args, **options):
+        base_dir = Path(settings.BASE_DIR)
+        for mode, async_views in MODES.items():
+            port = free_port()
+            env = {
+                **os.environ, 'ASYNC_VIEWS': async_views, 'WEB_CONCURRENCY': '1', 'PORT': str(port),
+                'RATELIMIT_ENABLED': 'False',
+            }
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+                cwd=base_dir, env=env,
+            )
+            try:
+                wait_for_port(port)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {mode}, concurrency {options["concurrency"]} ==='))
+                for path, body in PATHS:
+                    request = encode_request(path, body)
+                    asyncio.run(load(port, request, options['concurrency'], 100))  # warm-up
+                    elapsed, latencies, errors = asyncio.run(
+                        load(port, request, options['concurrency'], options['requests'])
+                    )
+                    latencies.sort()
+                    p99 = latencies[int(len(latencies) * 0.99) - 1]
+                    self.stdout.write(
+                        f'{path[:40]}: {len(latencies) / elapsed:,.0f} req/s, '
+                        f'p50 {statistics.median(latencies) * 1000:.1f} ms, '
+                        f'p99 {p99 * 1000:.1f} ms, errors {errors}'
+                    )
+            finally:
+                server.terminate()
+                server.wait()
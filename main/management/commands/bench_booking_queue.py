@@ -0,0 +1,103 @@
+"""Benchmark contact-form bookings per second under a burst, direct vs queued.
+
+Forked processes, standing in for gunicorn workers, each submit
+``--bookings`` bookings as fast as they can against a scratch copy of the
+schema. First they insert every booking in its own write transaction
+(BOOKING_QUEUE off), then they journal them for the write-behind flusher
+(BOOKING_QUEUE on). Acknowledged is the rate the visitors are answered at;
+stored is the rate until every booking is in the table::
+
+    python manage.py bench_booking_queue --processes 8 --bookings 300
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from main import booking_queue
+from main.models import Consultation, Service
+from main.sqlite import write_transaction
+
+
+def _submit(queued, service_id, count, start, results):
+    connection.close()  # never share the parent's connection
+    while time.time() < start:
+        time.sleep(0.001)
+    for i in range(count):
+        booking = {
+            'name': f'Burst {i}', 'email': f'burst{i}@example.com', 'phone': '0000000000',
+            'service_id': service_id, 'appointment_date': '2030-01-01',
+            'reference': booking_queue.new_reference(),
+        }
+        if queued:
+            booking_queue.enqueue(booking)
+        else:
+            with write_transaction():
+                Consultation.objects.create(**booking)
+    acknowledged = time.time()
+    if queued:
+        booking_queue.flush()
+    connection.close()
+    results.put((acknowledged, time.time()))
+
+
+class Command(BaseCommand):
+    help = "Compare booking throughput with direct inserts and with the write-behind queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Submitting processes')
+        parser.add_argument('--bookings', type=int, default=300, help='Bookings per process')
+
+    def run(self, path, queued, service_id, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        start = time.time() + 0.5
+        connection.close()
+        connection.settings_dict['NAME'] = path
+        workers = [
+            context.Process(target=_submit, args=(queued, service_id, options['bookings'], start, results))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        finished = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        total = options['processes'] * options['bookings']
+        stored = Consultation.objects.count()
+        connection.close()
+        acknowledged = max(done for done, _ in finished) - start
+        inserted = max(flushed for _, flushed in finished) - start
+        return (
+            f'{total / acknowledged:.0f} bookings/s acknowledged, {total / inserted:.0f} bookings/s stored '
+            f'({stored} of {total} rows)'
+        )
+
+    def handle(self, *args, **options):
+        original = connection.settings_dict['NAME']
+        directory = tempfile.mkdtemp(prefix='bench-booking-queue-')
+        template = os.path.join(directory, 'template.sqlite3')
+        try:
+            connection.close()
+            connection.settings_dict['NAME'] = template
+            call_command('migrate', verbosity=0)
+            service_id = Service.objects.get_or_create(
+                title='Interior design consultation', defaults={'description': ''}
+            )[0].pk
+            connection.close()
+            shutil.copy(template, os.path.join(directory, 'direct.sqlite3'))
+            shutil.copy(template, os.path.join(directory, 'queued.sqlite3'))
+            self.stdout.write(f'{connection.vendor}, {options["processes"]} processes x {options["bookings"]} bookings')
+            self.stdout.write(f"direct: {self.run(os.path.join(directory, 'direct.sqlite3'), False, service_id, options)}")
+            with override_settings(BOOKING_QUEUE=True, BOOKING_QUEUE_DIR=os.path.join(directory, 'queue')):
+                self.stdout.write(f"queued: {self.run(os.path.join(directory, 'queued.sqlite3'), True, service_id, options)}")
+        finally:
+            connection.close()
+            connection.settings_dict['NAME'] = original
+            shutil.rmtree(directory, ignore_errors=True)
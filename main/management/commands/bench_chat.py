@@ -0,0 +1,77 @@
+"""Benchmark chat intent matching: the compiled matcher against the old substring scan.
+
+    python manage.py bench_chat --iterations 20000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.chat import classify_intent
+
+CORPUS = [
+    "hi",
+    "Hello, is anyone there?",
+    "good morning! I just moved into a new flat",
+    "What eco-friendly materials do you recommend for flooring?",
+    "is bamboo better than cork for a kitchen floor",
+    "Do you use reclaimed wood for furniture?",
+    "what services do you offer",
+    "Can you help me redesign my living room?",
+    "I'd like to book a consultation next week",
+    "how do I schedule an appointment",
+    "are you available on saturday for a meeting",
+    "what colour palette would suit a small north-facing bedroom",
+    "tips for arranging furniture in an open plan space",
+    "this is my first time renovating, where do I start",
+    "How much does a full interior design project usually cost and how long does it take?",
+    "do you do low-VOC paints",
+    "I need ideas for indoor plants that survive low light",
+    "thanks!",
+    "my daughter wants a green and white themed room with lots of storage",
+    "can I change my booking date",
+]
+
+
+def legacy_classify(user_message):
+    """The original per-call keyword lists and substring checks, for comparison."""
+    eco_materials_keywords = ['material', 'eco', 'sustainable', 'green', 'environment', 'recycled', 'bamboo', 'cork', 'wood', 'furniture']
+    services_keywords = ['service', 'what do you', 'offer', 'provide', 'help', 'can you', 'do you']
+    booking_keywords = ['book', 'consultation', 'appointment', 'schedule', 'meeting', 'available']
+    design_keywords = ['design', 'interior', 'decor', 'style', 'color', 'room', 'space', 'layout', 'furniture', 'arrangement']
+    greeting_keywords = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']
+    if any(keyword in user_message for keyword in greeting_keywords):
+        return 'greeting'
+    if any(keyword in user_message for keyword in eco_materials_keywords):
+        return 'eco_materials'
+    if any(keyword in user_message for keyword in services_keywords):
+        return 'services'
+    if any(keyword in user_message for keyword in booking_keywords):
+        return 'booking'
+    if any(keyword in user_message for keyword in design_keywords):
+        return 'design'
+    return 'fallback'
+
+
+class Command(BaseCommand):
+    help = "Compare messages/sec of the compiled chat intent matcher against the legacy substring scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10000, help='Passes over the message corpus')
+
+    def handle(self, *args, **options):
+        messages = [message.lower() for message in CORPUS]
+        total = len(messages) * options['iterations']
+
+        for label, classify in (('legacy substring', legacy_classify), ('compiled regex', classify_intent)):
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                for message in messages:
+                    classify(message)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label}: {total / elapsed:,.0f} messages/sec')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nClassifications that changed:'))
+        for message in messages:
+            before, after = legacy_classify(message), classify_intent(message)
+            if before != after:
+                self.stdout.write(f'  {message!r}: {before} -> {after}')
@@ -0,0 +1,124 @@
+"""Benchmark the dashboard's Consultation query shapes with and without indexes.
+
+Runs against a throwaway test database (in-memory for SQLite, ``test_<name>``
+for Postgres) so the configured database is never touched::
+
+    python manage.py bench_dashboard --rows 100000
+    DATABASE_URL=postgres://... python manage.py bench_dashboard
+"""
+import datetime
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from main.models import Consultation, Service
+from main.search import search_consultations
+
+SERVICES = [
+    'Interior design consultation',
+    'Custom eco-friendly furniture',
+    'Renovation with sustainable materials',
+    'Green spaces and indoor plants',
+]
+
+
+def query_shapes():
+    """The querysets the dashboard issues, keyed by a short label."""
+    date_from = datetime.date(2025, 3, 1)
+    date_to = datetime.date(2025, 3, 31)
+    newest = ('-submitted_at', '-id')
+    services = {service.title: service for service in Service.objects.filter(title__in=SERVICES)}
+    return {
+        'first page': Consultation.objects.order_by(*newest)[:26],
+        'service filter': Consultation.objects.filter(service=services[SERVICES[1]]).order_by(*newest)[:26],
+        'date range': Consultation.objects.filter(
+            appointment_date__gte=date_from, appointment_date__lte=date_to
+        ).order_by(*newest)[:26],
+        'service + date range': Consultation.objects.filter(
+            service=services[SERVICES[2]], appointment_date__gte=date_from, appointment_date__lte=date_to
+        ).order_by(*newest)[:26],
+        'service count': Consultation.objects.filter(service=services[SERVICES[0]]),
+        'search (LIKE)': Consultation.objects.filter(
+            Q(name__icontains='customer4711') | Q(email__icontains='customer4711') |
+            Q(phone__icontains='customer4711') | Q(service__title__icontains='customer4711')
+        ).order_by(*newest)[:26],
+        'search (full-text)': search_consultations(Consultation.objects.all(), 'customer4711').order_by(*newest)[:26],
+    }
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and print EXPLAIN plans and timings for dashboard queries before/after indexing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Consultations to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(options['rows'])
+            indexes = Consultation._meta.indexes
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Consultation, index)
+            self.report('without indexes', options['repeat'])
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Consultation, index)
+            self.report('with indexes', options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, rows):
+        rng = random.Random(42)
+        services = [Service.objects.get_or_create(title=title, defaults={'description': ''})[0] for title in SERVICES]
+        start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        batch = []
+        for i in range(rows):
+            batch.append(Consultation(
+                name=f'Customer {i}',
+                email=f'customer{i}@example.com',
+                phone=f'{9000000000 + i}',
+                service=rng.choice(services),
+                appointment_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365)),
+            ))
+            if len(batch) == 5000:
+                Consultation.objects.bulk_create(batch)
+                batch = []
+        Consultation.objects.bulk_create(batch)
+        # auto_now_add stamps every row alike; spread submitted_at out so ordering is realistic
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "UPDATE main_consultation SET submitted_at = %s::timestamptz + id * interval '7 minutes'",
+                    [start],
+                )
+            else:
+                cursor.execute(
+                    "UPDATE main_consultation SET submitted_at = datetime(%s, '+' || (id * 7) || ' minutes')",
+                    [start.strftime('%Y-%m-%d %H:%M:%S')],
+                )
+            if connection.vendor == 'postgresql':
+                cursor.execute('ANALYZE main_consultation')
+            else:
+                cursor.execute('ANALYZE')
+        self.stdout.write(f'Seeded {rows} consultations on {connection.vendor}')
+
+    def report(self, label, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {label} ==='))
+        for name, queryset in query_shapes().items():
+            # .all() clones the queryset so each run hits the database
+            run = (lambda qs=queryset: qs.all().count()) if name.endswith('count') else (lambda qs=queryset: list(qs.all()))
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms'
+            ))
+            self.stdout.write(queryset.explain())
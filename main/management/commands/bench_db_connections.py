@@ -0,0 +1,71 @@
+"""Benchmark the per-request cost of opening database connections.
+
+Replays request cycles (``request_started``, a few queries,
+``request_finished``, the signals Django closes stale connections on)
+against the configured database with connections closed after every
+request, as before DATABASE_URL support, then kept open with health
+checks, then from the connection pool when DATABASE_POOL is on. Point it
+at a local Postgres to see the real setup cost::
+
+    DATABASE_URL=postgres://localhost/econest python manage.py bench_db_connections
+    DATABASE_URL=postgres://localhost/econest DATABASE_POOL=True python manage.py bench_db_connections
+"""
+import copy
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    help = "Print the per-request cost of per-request, persistent and pooled database connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Request cycles per mode')
+        parser.add_argument('--queries', type=int, default=3, help='Queries per request')
+
+    def replay(self, settings_dict, requests, queries):
+        connection.close()
+        connection.settings_dict = settings_dict
+        opened = []
+        counter = lambda sender, connection, **kwargs: opened.append(1)  # noqa: E731
+        connection_created.connect(counter, weak=False)
+        try:
+            started = time.perf_counter()
+            for _ in range(requests):
+                request_started.send(sender=self.__class__)
+                with connection.cursor() as cursor:
+                    for _ in range(queries):
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                request_finished.send(sender=self.__class__)
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(counter)
+        return elapsed / requests, len(opened)
+
+    def handle(self, *args, **options):
+        configured = connection.settings_dict
+        unpooled = copy.deepcopy(configured)
+        pool = unpooled.get('OPTIONS', {}).pop('pool', None)
+        modes = [
+            ('connect per request', {**unpooled, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}),
+            ('persistent + health checks', {**unpooled, 'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}),
+        ]
+        if pool:
+            modes.append(('connection pool', configured))
+
+        self.stdout.write(f'{connection.vendor} database, {options["requests"]} requests of {options["queries"]} queries')
+        try:
+            for label, settings_dict in modes:
+                per_request, opened = self.replay(settings_dict, options['requests'], options['queries'])
+                self.stdout.write(f'{label}: {per_request * 1e6:.1f} us/request, {opened} connects')
+        finally:
+            connection.close()
+            connection.settings_dict = configured
+            if pool:
+                connection.close_pool()
+        if not pool:
+            self.stdout.write('connection pool: not configured (set DATABASE_POOL=True with a Postgres DATABASE_URL)')
@@ -0,0 +1,38 @@
+"""Benchmark the hashed n-gram intent classifier, one message at a time and in batches.
+
+    python manage.py bench_intents --messages 20000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.chat import CLASSIFIER, classify_intent, classify_intents
+from main.management.commands.bench_chat import CORPUS
+
+
+class Command(BaseCommand):
+    help = "Print messages/sec of single and batched intent classification"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=20000, help='Messages to classify per run')
+        parser.add_argument('--batch-size', type=int, default=256, help='Rows per matrix product')
+
+    def handle(self, *args, **options):
+        messages = [CORPUS[i % len(CORPUS)].lower() for i in range(options['messages'])]
+        CLASSIFIER.batch_size = options['batch_size']
+
+        runs = (
+            ('classifier, one at a time', lambda: [CLASSIFIER.classify(message) for message in messages]),
+            ('classifier, batched', lambda: CLASSIFIER.predict(messages)),
+            ('classify_intent, one at a time', lambda: [classify_intent(message) for message in messages]),
+            ('classify_intents, batched', lambda: classify_intents(messages)),
+        )
+        for label, run in runs:
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label}: {len(messages) / elapsed:,.0f} messages/sec')
+
+        single = [classify_intent(message) for message in messages[:len(CORPUS)]]
+        if single != classify_intents(messages[:len(CORPUS)]):
+            self.stderr.write(self.style.ERROR('Batched and single classification disagree'))
@@ -0,0 +1,53 @@
+"""Benchmark the rate limiter's own overhead on a trivial view.
+
+Uses the configured cache (LocMem by default, Redis when REDIS_URL is set)
+with keys spread over many client IPs so no request is rejected::
+
+    python manage.py bench_ratelimit --requests 50000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from main.ratelimit import TokenBucket, rate_limit
+
+
+def plain_view(request):
+    return HttpResponse('ok')
+
+
+limited_view = rate_limit('bench', rate='1000/s', burst=1000)(plain_view)
+
+
+class Command(BaseCommand):
+    help = "Print the per-request cost of the token-bucket rate limiter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50000, help='Requests per run')
+        parser.add_argument('--clients', type=int, default=1000, help='Distinct client IPs')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = [
+            factory.get('/api/chat/', REMOTE_ADDR=f'10.0.{i // 256 % 256}.{i % 256}')
+            for i in range(options['clients'])
+        ]
+        total = options['requests']
+
+        timings = {}
+        for label, view in (('without limiter', plain_view), ('with limiter', limited_view)):
+            started = time.perf_counter()
+            for i in range(total):
+                view(requests[i % len(requests)])
+            timings[label] = (time.perf_counter() - started) / total
+            self.stdout.write(f'{label}: {timings[label] * 1e6:.1f} us/request')
+        self.stdout.write(
+            f'limiter overhead: {(timings["with limiter"] - timings["without limiter"]) * 1e6:.1f} us/request'
+        )
+
+        bucket = TokenBucket('10/s', 5)
+        now = time.time()
+        admitted = sum(not bucket.take('ratelimit:bench:burst', now) for _ in range(20))
+        self.stdout.write(f'burst check: {admitted} of 20 simultaneous requests admitted (burst 5)')
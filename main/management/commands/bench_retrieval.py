@@ -0,0 +1,112 @@
+"""Benchmark the chat assistant's BM25 index on a synthetic corpus.
+
+Nothing is read from or written to the database::
+
+    python manage.py bench_retrieval --documents 5000
+"""
+import os
+import pickle
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.management.commands.bench_chat import CORPUS
+from main.retrieval import BM25Index
+
+TOPIC_WORDS = (
+    'bamboo cork reclaimed wood linoleum flooring paint clay lime plaster jute hemp wool cotton '
+    'linen rattan cane teak oak walnut stone terrazzo concrete tile brick glass steel copper brass '
+    'lighting daylight window blinds curtain rug sofa chair table shelf storage wardrobe bed desk '
+    'kitchen bathroom bedroom living room hallway balcony garden plant fern palm succulent moss '
+    'colour palette neutral earthy green white warm cool texture pattern layout space small open '
+    'plan renovation insulation energy efficient solar ventilation humidity air quality toxin '
+    'budget timeline consultation designer client home apartment villa studio office cafe'
+).split()
+
+
+def vocabulary(size, rng):
+    """Interior-design words spread through ``size`` ranks of made-up filler words."""
+    syllables = ['ba', 'ko', 'ri', 'ten', 'mar', 'lo', 'vin', 'sa', 'dre', 'pu', 'gal', 'fe', 'tor', 'ny']
+    words = list(dict.fromkeys(
+        ''.join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(size * 2)
+    ))[:size - len(TOPIC_WORDS)]
+    for rank, word in zip(range(20, size, size // len(TOPIC_WORDS)), TOPIC_WORDS):
+        words.insert(rank, word)
+    return words
+
+
+def synthetic_text(rng, words, vocabulary):
+    """Sentences of Zipf-distributed ``vocabulary`` words."""
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    tokens = rng.choices(vocabulary, weights, k=words)
+    sentences = [' '.join(tokens[i:i + 12]).capitalize() + '.' for i in range(0, words, 12)]
+    return ' '.join(sentences)
+
+
+class Command(BaseCommand):
+    help = "Time BM25 index build, query latency and snapshot save/load on synthetic documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=3000, help='Documents to index')
+        parser.add_argument('--words', type=int, default=150, help='Words per document')
+        parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct words in the corpus')
+        parser.add_argument('--iterations', type=int, default=200, help='Passes over the query corpus')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        words = vocabulary(options['vocabulary'], rng)
+        documents = [
+            (('blogpost', pk), f'Post {pk}', synthetic_text(rng, options['words'], words))
+            for pk in range(options['documents'])
+        ]
+
+        started = time.perf_counter()
+        index = BM25Index()
+        for key, title, text in documents:
+            index.add(key, title, text, f'/blog/{key[1]}/')
+        self.stdout.write(
+            f'build: {len(index)} documents, {len(index.postings)} terms in {time.perf_counter() - started:.2f}s'
+        )
+
+        queries = [message.lower() for message in CORPUS]
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        self.stdout.write(
+            f'first queries (term weights computed): {(time.perf_counter() - started) / len(queries) * 1e6:.0f} us/query'
+        )
+
+        timings = []
+        for _ in range(options['iterations']):
+            for query in queries:
+                started = time.perf_counter()
+                index.search(query)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(
+            f'query: mean {statistics.mean(timings) * 1e6:.0f} us, '
+            f'p50 {timings[len(timings) // 2] * 1e6:.0f} us, '
+            f'p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us'
+        )
+
+        started = time.perf_counter()
+        index.add(('blogpost', 0), 'Post 0', synthetic_text(rng, options['words'], words))
+        index.remove(('blogpost', 1))
+        self.stdout.write(f'update + delete: {(time.perf_counter() - started) * 1e6:.0f} us')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index.pickle')
+            started = time.perf_counter()
+            with open(path, 'wb') as handle:
+                pickle.dump(index, handle)
+            saved = time.perf_counter() - started
+            started = time.perf_counter()
+            with open(path, 'rb') as handle:
+                pickle.load(handle)
+            self.stdout.write(
+                f'snapshot: {os.path.getsize(path) / 1e6:.1f} MB, save {saved * 1e3:.0f} ms, '
+                f'load {(time.perf_counter() - started) * 1e3:.0f} ms'
+            )
@@ -0,0 +1,23 @@
+"""Build the chat assistant's search index and write its warm-start snapshot.
+
+    python manage.py build_chat_index
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import retrieval
+
+
+class Command(BaseCommand):
+    help = "Index service descriptions and blog posts for the chat assistant and snapshot the index to disk"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = retrieval.build_index()
+        retrieval.save_snapshot(index)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {len(index)} documents ({len(index.postings)} terms) in '
+            f'{time.perf_counter() - started:.2f}s -> {settings.CHAT_INDEX_SNAPSHOT}'
+        ))
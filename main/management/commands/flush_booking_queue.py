@@ -0,0 +1,20 @@
+"""Replay booking journals left behind by stopped or crashed processes.
+
+Journals still locked by a running worker are left to that worker::
+
+    python manage.py flush_booking_queue
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import booking_queue
+
+
+class Command(BaseCommand):
+    help = "Insert queued bookings from the journals of processes that are no longer running"
+
+    def handle(self, *args, **options):
+        inserted = booking_queue.recover()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recovered {inserted} queued bookings from {settings.BOOKING_QUEUE_DIR}'
+        ))
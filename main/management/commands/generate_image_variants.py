@@ -0,0 +1,30 @@
+"""Generate responsive variants for images uploaded before the pipeline existed.
+
+    python manage.py generate_image_variants [--force]
+"""
+from django.core.management.base import BaseCommand
+
+from main.images import generate_variants, needs_variants
+from main.models import BlogPost, GalleryImage, Service
+
+
+class Command(BaseCommand):
+    help = "Write WebP/JPEG width variants for gallery, service and blog images that lack them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist')
+
+    def handle(self, *args, **options):
+        for model in (GalleryImage, Service, BlogPost):
+            done = 0
+            for instance in model.objects.exclude(image='').exclude(image__isnull=True).iterator():
+                if not (options['force'] or needs_variants(instance)):
+                    continue
+                try:
+                    record = generate_variants(instance.image.storage, instance.image.name)
+                except Exception as e:
+                    self.stderr.write(f'{model.__name__} {instance.pk}: {str(e)}')
+                    continue
+                model.objects.filter(pk=instance.pk).update(image_variants=record)
+                done += 1
+            self.stdout.write(f'{model.__name__}: {done} images processed')
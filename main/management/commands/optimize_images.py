@@ -0,0 +1,38 @@
+"""Recompress the bundled static images into AVIF/WebP/JPEG width variants.
+
+Run before collectstatic (see build.sh)::
+
+    python manage.py optimize_images [--force]
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import static_images
+
+
+class Command(BaseCommand):
+    help = "Write resized AVIF/WebP/JPEG variants of main/static/main/images and their manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-encode images whose content has not changed')
+        parser.add_argument('--workers', type=int, default=4, help='Images encoded in parallel')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        optimised, skipped, removed = static_images.build(options['force'], options['workers'])
+        self.stdout.write(
+            f'{len(optimised)} optimised, {len(skipped)} unchanged, {len(removed)} removed '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+        manifest = static_images.load_manifest() or static_images.read_manifest()
+        original = smallest = 0
+        for key, entry in manifest.items():
+            original += os.path.getsize(os.path.join(static_images.SOURCE_DIR, os.path.basename(key)))
+            # What a browser with AVIF support downloads at full width
+            best = entry['variants'].get('avif') or entry['variants'].get('webp') or []
+            full = [v for v in best if v['width'] == entry['width']]
+            smallest += os.path.getsize(os.path.join(static_images.OUTPUT_DIR, os.path.basename(full[0]['path']))) if full else 0
+        self.stdout.write(f'originals: {original / 1024:,.0f} KB, full-width {static_images.available_formats()[0]}: {smallest / 1024:,.0f} KB')
@@ -0,0 +1,130 @@
+"""Multi-process write/read stress test of the SQLite tuning in main.sqlite.
+
+Writer processes book consultations the way the contact view does (look
+the service up, insert the booking), editor processes change bookings in
+one transaction the way admin saves do, and reader processes run the
+dashboard's count and first page, all against a scratch copy of the
+schema. The test runs twice: with SQLite's defaults (rollback journal, no
+PRAGMAs, as before) and with SQLITE_PRAGMAS and ``write_transaction()``
+for bookings. Edits use deferred transactions in both runs, as on the
+site::
+
+    python manage.py stress_sqlite --writers 4 --editors 2 --readers 4 --seconds 5
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from main.models import Consultation, Service
+from main.sqlite import write_transaction
+
+
+def _book(tuned, index):
+    service = Service.objects.filter(title='Interior design consultation').first()
+    fields = dict(
+        name=f'Stress {index}', email=f'stress{index}@example.com', phone='0000000000',
+        service=service, appointment_date='2030-01-01',
+    )
+    if tuned:
+        with write_transaction():
+            Consultation.objects.create(**fields)
+    else:
+        Consultation.objects.create(**fields)
+
+
+def _edit(tuned, index):
+    # Read-modify-write in one transaction, as admin saves are
+    with transaction.atomic():
+        booking = Consultation.objects.order_by('-id').first()
+        if booking is not None:
+            booking.phone = f'{index:010d}'
+            booking.save(update_fields=['phone'])
+
+
+def _read(tuned, index):
+    Consultation.objects.count()
+    list(Consultation.objects.select_related('service').order_by('-submitted_at', '-id')[:25])
+
+
+def _worker(task, tuned, start, stop, results):
+    connection.close()  # never share the parent's connection
+    done = locked = 0
+    while time.time() < start:
+        time.sleep(0.001)
+    while time.time() < stop:
+        try:
+            task(tuned, done)
+            done += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    connection.close()
+    results.put((task.__name__, done, locked))
+
+
+class Command(BaseCommand):
+    help = "Compare booking/read throughput and lock errors with default and tuned SQLite settings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Booking processes')
+        parser.add_argument('--editors', type=int, default=2, help='Booking-editing processes')
+        parser.add_argument('--readers', type=int, default=4, help='Dashboard-reading processes')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+
+    def run(self, path, tuned, options):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        start = time.time() + 0.5
+        stop = start + options['seconds']
+        workers = [
+            context.Process(target=_worker, args=(task, tuned, start, stop, results))
+            for task, count in ((_book, options['writers']), (_edit, options['editors']), (_read, options['readers']))
+            for _ in range(count)
+        ]
+        connection.close()
+        connection.settings_dict['NAME'] = path
+        for worker in workers:
+            worker.start()
+        totals = {'_book': [0, 0], '_edit': [0, 0], '_read': [0, 0]}
+        for _ in workers:
+            name, done, locked = results.get()
+            totals[name][0] += done
+            totals[name][1] += locked
+        for worker in workers:
+            worker.join()
+        seconds = options['seconds']
+        return (
+            f"{totals['_book'][0] / seconds:.0f} bookings/s, {totals['_edit'][0] / seconds:.0f} edits/s, "
+            f"{totals['_read'][0] / seconds:.0f} reads/s, "
+            f"{sum(locked for _, locked in totals.values())} 'database is locked' errors"
+        )
+
+    def handle(self, *args, **options):
+        original = connection.settings_dict['NAME']
+        original_options = dict(connection.settings_dict.get('OPTIONS', {}))
+        directory = tempfile.mkdtemp(prefix='stress-sqlite-')
+        template = os.path.join(directory, 'template.sqlite3')
+        try:
+            connection.close()
+            connection.settings_dict['NAME'] = template
+            with override_settings(SQLITE_PRAGMAS={}):
+                call_command('migrate', verbosity=0)
+                Service.objects.get_or_create(title='Interior design consultation', defaults={'description': ''})
+                connection.close()
+                shutil.copy(template, os.path.join(directory, 'default.sqlite3'))
+                self.stdout.write(f"defaults: {self.run(os.path.join(directory, 'default.sqlite3'), False, options)}")
+            shutil.copy(template, os.path.join(directory, 'tuned.sqlite3'))
+            self.stdout.write(f"tuned:    {self.run(os.path.join(directory, 'tuned.sqlite3'), True, options)}")
+        finally:
+            connection.close()
+            connection.settings_dict['NAME'] = original
+            connection.settings_dict['OPTIONS'] = original_options
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,91 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import routers
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that stays out of the way of async views under ASGI.
+
+    WhiteNoise is sync-only, and a sync middleware makes Django run the whole
+    chain below it, async views included, on a worker thread. This subclass
+    is async-capable: static file lookups are a dict read, and only the
+    (rare) static responses are built on a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaPinningMiddleware:
+    """Keeps a client's reads on the primary database around its writes.
+
+    Unsafe requests read from the primary throughout, and a request that
+    wrote sets a cookie pinning the client's reads to the primary for
+    DATABASE_REPLICA_PIN_SECONDS (see ``main.routers``). Unused without
+    replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    cookie_name = 'db_primary'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def pinned(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or self.cookie_name in request.COOKIES
+
+    def finish(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = routers.begin_request(self.pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.end_request(token)
+        return self.finish(response, wrote)
+
+    async def __acall__(self, request):
+        token = routers.begin_request(self.pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = routers.end_request(token)
+        return self.finish(response, wrote)
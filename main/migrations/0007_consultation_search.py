@@ -0,0 +1,85 @@
+from django.db import migrations
+
+# Phone digits without separators, and the trailing ten digits (national number)
+SQLITE_DIGITS = (
+    "replace(replace(replace(replace(replace(replace(replace("
+    "{row}.phone, ' ', ''), '-', ''), '+', ''), '(', ''), ')', ''), '.', ''), '/', '')"
+)
+SQLITE_PHONE = f"{SQLITE_DIGITS} || ' ' || substr({SQLITE_DIGITS}, -10)"
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE main_consultation_fts USING fts5(name, email, phone, service)",
+    "INSERT INTO main_consultation_fts(rowid, name, email, phone, service) "
+    "SELECT id, name, email, {phone}, service FROM main_consultation".format(
+        phone=SQLITE_PHONE.format(row='main_consultation')
+    ),
+    "CREATE TRIGGER main_consultation_fts_ai AFTER INSERT ON main_consultation BEGIN "
+    "INSERT INTO main_consultation_fts(rowid, name, email, phone, service) "
+    "VALUES (new.id, new.name, new.email, {phone}, new.service); END".format(
+        phone=SQLITE_PHONE.format(row='new')
+    ),
+    "CREATE TRIGGER main_consultation_fts_au AFTER UPDATE ON main_consultation BEGIN "
+    "UPDATE main_consultation_fts SET name = new.name, email = new.email, "
+    "phone = {phone}, service = new.service WHERE rowid = old.id; END".format(
+        phone=SQLITE_PHONE.format(row='new')
+    ),
+    "CREATE TRIGGER main_consultation_fts_ad AFTER DELETE ON main_consultation BEGIN "
+    "DELETE FROM main_consultation_fts WHERE rowid = old.id; END",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS main_consultation_fts_ad",
+    "DROP TRIGGER IF EXISTS main_consultation_fts_au",
+    "DROP TRIGGER IF EXISTS main_consultation_fts_ai",
+    "DROP TABLE IF EXISTS main_consultation_fts",
+]
+
+# Must match main.search.PG_DOCUMENT exactly for the planner to use the index
+POSTGRES_FORWARD = [
+    "CREATE INDEX consult_search_idx ON main_consultation USING GIN ("
+    "to_tsvector('simple', name || ' ' || email || ' ' || service || ' ' || "
+    "regexp_replace(phone, '[^0-9]', '', 'g') || ' ' || "
+    "right(regexp_replace(phone, '[^0-9]', '', 'g'), 10)))",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS consult_search_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite' and sqlite_has_fts5(schema_editor):
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_consultation_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
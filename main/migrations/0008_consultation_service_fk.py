@@ -0,0 +1,185 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+DEFAULT_SERVICES = [
+    'Interior design consultation',
+    'Custom eco-friendly furniture',
+    'Renovation with sustainable materials',
+    'Green spaces and indoor plants',
+]
+
+# Search structures from 0007. They reference main_consultation.service, and
+# SQLite drops triggers whenever Django rebuilds the table, so they are torn
+# down first and rebuilt without the service column at the end.
+SQLITE_DIGITS = (
+    "replace(replace(replace(replace(replace(replace(replace("
+    "{row}.phone, ' ', ''), '-', ''), '+', ''), '(', ''), ')', ''), '.', ''), '/', '')"
+)
+SQLITE_PHONE = f"{SQLITE_DIGITS} || ' ' || substr({SQLITE_DIGITS}, -10)"
+
+# Postgres search document: the text columns, then the phone number's digits
+# (full and national form). main.search queries this exact expression, which
+# Postgres needs to use the index; it is copied here, not imported, so this
+# migration keeps building the same index whatever main.search becomes.
+PG_PHONE = "regexp_replace(phone, '[^0-9]', '', 'g') || ' ' || right(regexp_replace(phone, '[^0-9]', '', 'g'), 10)"
+
+
+def pg_document(columns):
+    terms = [column for column in columns if column != 'phone']
+    if 'phone' in columns:
+        terms.append(PG_PHONE)
+    return "to_tsvector('simple', " + " || ' ' || ".join(terms) + ")"
+
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS main_consultation_fts_ad",
+    "DROP TRIGGER IF EXISTS main_consultation_fts_au",
+    "DROP TRIGGER IF EXISTS main_consultation_fts_ai",
+    "DROP TABLE IF EXISTS main_consultation_fts",
+]
+
+
+def sqlite_create(columns):
+    """FTS5 table, backfill and sync triggers over ``columns`` (phone is digit-normalised)."""
+    def value(row, column):
+        return SQLITE_PHONE.format(row=row) if column == 'phone' else f'{row}.{column}'
+
+    names = ', '.join(columns)
+    return [
+        f"CREATE VIRTUAL TABLE main_consultation_fts USING fts5({names})",
+        f"INSERT INTO main_consultation_fts(rowid, {names}) SELECT id, "
+        + ', '.join(value('main_consultation', c) for c in columns)
+        + " FROM main_consultation",
+        "CREATE TRIGGER main_consultation_fts_ai AFTER INSERT ON main_consultation BEGIN "
+        f"INSERT INTO main_consultation_fts(rowid, {names}) VALUES (new.id, "
+        + ', '.join(value('new', c) for c in columns)
+        + "); END",
+        "CREATE TRIGGER main_consultation_fts_au AFTER UPDATE ON main_consultation BEGIN "
+        "UPDATE main_consultation_fts SET "
+        + ', '.join(f"{c} = {value('new', c)}" for c in columns)
+        + " WHERE rowid = old.id; END",
+        "CREATE TRIGGER main_consultation_fts_ad AFTER DELETE ON main_consultation BEGIN "
+        "DELETE FROM main_consultation_fts WHERE rowid = old.id; END",
+    ]
+
+
+def postgres_create(columns):
+    return [f"CREATE INDEX consult_search_idx ON main_consultation USING GIN ({pg_document(columns)})"]
+
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS consult_search_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def search_builder(columns):
+    def create(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite' and sqlite_has_fts5(schema_editor):
+            _run(schema_editor, sqlite_create(columns))
+        elif vendor == 'postgresql':
+            _run(schema_editor, postgres_create(columns))
+    return create
+
+
+def drop_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_DROP)
+
+
+def link_services(apps, schema_editor):
+    """Point bookings at the Service their free-text service names.
+
+    Values matching a default service apart from case and spacing go to it.
+    Any other value gets a bare Service of its own, which 0015 unlists so it
+    never reaches public pages.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        # Check the new FK now rather than at commit, so the ALTER TABLEs that
+        # follow in this transaction do not hit "pending trigger events"
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE", params=None)
+    db = schema_editor.connection.alias
+    Consultation = apps.get_model('main', 'Consultation')
+    Service = apps.get_model('main', 'Service')
+    defaults = {}
+    for title in DEFAULT_SERVICES:
+        service = Service.objects.using(db).filter(title=title).order_by('pk').first()
+        if service is None:
+            service = Service.objects.using(db).create(title=title, description='')
+        defaults[title.lower()] = service
+    booked = Consultation.objects.using(db).values_list('service', flat=True).distinct()
+    for title in booked:
+        service = defaults.get(' '.join(title.split()).lower())
+        if service is None:
+            service = Service.objects.using(db).filter(title=title).order_by('pk').first()
+        if service is None:
+            service = Service.objects.using(db).create(title=title, description='')
+        Consultation.objects.using(db).filter(service=title).update(service_ref=service)
+
+
+def unlink_services(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Consultation = apps.get_model('main', 'Consultation')
+    Service = apps.get_model('main', 'Service')
+    for service in Service.objects.using(db).filter(consultations_ref__isnull=False).distinct():
+        Consultation.objects.using(db).filter(service_ref=service).update(service=service.title)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_consultation_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search, search_builder(['name', 'email', 'phone', 'service'])),
+        migrations.RemoveIndex(
+            model_name='consultation',
+            name='consult_service_date_idx',
+        ),
+        migrations.AddField(
+            model_name='consultation',
+            name='service_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='consultations_ref', to='main.service'),
+        ),
+        migrations.RunPython(link_services, unlink_services),
+        # Give the old column a default so reversing the RemoveField can re-add it
+        migrations.AlterField(
+            model_name='consultation',
+            name='service',
+            field=models.CharField(default='', max_length=200),
+        ),
+        migrations.RemoveField(
+            model_name='consultation',
+            name='service',
+        ),
+        migrations.RenameField(
+            model_name='consultation',
+            old_name='service_ref',
+            new_name='service',
+        ),
+        migrations.AlterField(
+            model_name='consultation',
+            name='service',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='consultations', to='main.service'),
+        ),
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['service', 'appointment_date'], name='consult_service_date_idx'),
+        ),
+        migrations.RunPython(search_builder(['name', 'email', 'phone']), drop_search),
+    ]
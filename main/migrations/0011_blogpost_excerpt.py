@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:53
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def backfill_excerpts(apps, schema_editor):
+    BlogPost = apps.get_model('main', 'BlogPost')
+    db = schema_editor.connection.alias
+    posts = list(BlogPost.objects.using(db).only('content'))
+    for post in posts:
+        post.excerpt = Truncator(post.content).words(20, truncate=" …")
+    BlogPost.objects.using(db).bulk_update(posts, ['excerpt'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_gallery_uploaded_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-created_at', '-id'], name='blog_created_idx'),
+        ),
+    ]
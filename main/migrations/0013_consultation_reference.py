@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # A nullable column and a partial unique index are both added in place,
+    # so SQLite keeps main_consultation and its search triggers from 0008
+
+    dependencies = [
+        ('main', '0012_blogpost_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultation',
+            name='reference',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='consultation',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(reference__isnull=False), fields=('reference',), name='consult_reference_uniq',
+            ),
+        ),
+    ]
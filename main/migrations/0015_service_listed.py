@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+DEFAULT_SERVICES = [
+    'Interior design consultation',
+    'Custom eco-friendly furniture',
+    'Renovation with sustainable materials',
+    'Green spaces and indoor plants',
+]
+
+
+def unlist_booking_services(apps, schema_editor):
+    """Unlist the bare services 0008 created from free-text booking values."""
+    Service = apps.get_model('main', 'Service')
+    Service.objects.using(schema_editor.connection.alias).exclude(title__in=DEFAULT_SERVICES).filter(description='').update(listed=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_consultation_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='listed',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(unlist_booking_services, migrations.RunPython.noop),
+    ]
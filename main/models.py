@@ -1,35 +1,132 @@
 from django.db import models
+from django.utils.text import Truncator
 
 class Consultation(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=20)
-    service = models.CharField(max_length=200)
+    # Indexed through the leading column of consult_service_date_idx
+    service = models.ForeignKey('Service', on_delete=models.PROTECT, related_name='consultations', db_index=False)
     appointment_date = models.DateField()
     submitted_at = models.DateTimeField(auto_now_add=True)
+    # Shown to the visitor on booking; unique, and what lets the write-behind
+    # queue replay a batch without duplicating it. Older bookings have none.
+    reference = models.CharField(max_length=16, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reference'], condition=models.Q(reference__isnull=False), name='consult_reference_uniq',
+            ),
+        ]
+        indexes = [
+            # Dashboard listing and keyset pagination order
+            models.Index(fields=['-submitted_at', '-id'], name='consult_submitted_idx'),
+            # Service filter, optionally with a date range, and the DISTINCT service scan
+            models.Index(fields=['service', 'appointment_date'], name='consult_service_date_idx'),
+            # Date range filter on its own
+            models.Index(fields=['appointment_date'], name='consult_appt_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.service}"
+class ServiceQuerySet(models.QuerySet):
+    def public(self):
+        """Listed services with copy of their own, for the Services page."""
+        return self.filter(listed=True).exclude(description='')
+
+
 class Service(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to='services/', blank=True, null=True)
+    # Responsive width variants of image, filled in by main.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Offered to visitors: in the booking form, on the Services page and in
+    # chat answers. Unlisted services stay bookable from the dashboard.
+    listed = models.BooleanField(default=True)
+
+    objects = ServiceQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 class GalleryImage(models.Model):
     title = models.CharField(max_length=200, blank=True)
     image = models.ImageField(upload_to='gallery/')
+    # Responsive width variants of image, filled in by main.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Gallery listing and keyset pagination order
+            models.Index(fields=['-uploaded_at', '-id'], name='gallery_uploaded_idx'),
+        ]
+
     def __str__(self):
         return self.title or "Gallery Image"
+EXCERPT_WORDS = 20
+
+
+def make_excerpt(content):
+    """The blog list teaser, as ``truncatewords:20`` would render it."""
+    return Truncator(content).words(EXCERPT_WORDS, truncate=" …")
+
+
 class BlogPost(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
+    # First EXCERPT_WORDS words of content, kept in step by save()
+    excerpt = models.TextField(blank=True, editable=False)
     image = models.ImageField(upload_to='blog/', blank=True, null=True)
+    # Responsive width variants of image, filled in by main.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     author = models.CharField(max_length=100, default="EcoNest Team")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Drives the post page's ETag/Last-Modified and cached copy
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Blog listing and keyset pagination order
+            models.Index(fields=['-created_at', '-id'], name='blog_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.excerpt = make_excerpt(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+            if 'content' in update_fields:
+                kwargs['update_fields'].add('excerpt')
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.title
+
+
+# A booking submission's idempotency key and, once it went through, its
+# response (see main.idempotency)
+class IdempotencyKey(models.Model):
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    # Digest of the submitted form, to refuse a key reused for other data
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request with the key is still running
+    status = models.PositiveSmallIntegerField(null=True)
+    content = models.BinaryField(blank=True, default=b'')
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=2048, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq'),
+        ]
+        indexes = [
+            # Purging expired keys
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
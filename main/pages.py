@@ -0,0 +1,190 @@
+"""Cached rendered pages.
+
+The marketing pages (home, about, services) are cached whole by
+``cached_page``: a hit is answered from the stored body without rendering
+a template, and its ETag lets browsers revalidate with a bodyless 304.
+Pages that show model data name the data they depend on, and their keys
+carry that data's version number; bumping it (``invalidate``, called from
+``main.signals``) retires every page built from the old data in every
+worker sharing the cache. The service cards on the services page are also
+cached as a template fragment under the same version, so only the page
+shell is re-rendered when just the page entry is missing.
+
+A blog post's page is rendered once and cached together with the post's
+``updated_at``. A repeat request is answered from that entry without a
+query or a template render, and the same timestamp drives the ETag and
+Last-Modified headers, so a client holding the current copy gets a 304.
+The receivers in ``main.signals`` drop a post's entry when it is saved or
+deleted.
+
+Pages are always rendered from the primary database on a miss: an entry
+built from a lagging replica would outlive the lag.
+
+Every key includes PAGE_CACHE_RELEASE, so a deploy with new templates
+never serves pages rendered by the previous one.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from .models import BlogPost, Service
+from .routers import primary
+
+# Version key of the data each model feeds into cached pages
+VERSION_KEYS = {
+    Service: 'page:services:version',
+}
+
+
+def version(model):
+    key = VERSION_KEYS[model]
+    cache.add(key, 1, None)
+    return cache.get(key, 1)
+
+
+async def aversion(model):
+    key = VERSION_KEYS[model]
+    await cache.aadd(key, 1, None)
+    return await cache.aget(key, 1)
+
+
+def fragment_version(model):
+    """Vary-on value for a ``{% cache %}`` fragment built from ``model``."""
+    return f'{settings.PAGE_CACHE_RELEASE}-{version(model)}'
+
+
+async def afragment_version(model):
+    return f'{settings.PAGE_CACHE_RELEASE}-{await aversion(model)}'
+
+
+def invalidate(model):
+    """Retire every cached page built from ``model``'s rows."""
+    key = VERSION_KEYS.get(model)
+    if key is None:
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def _page_key(request, versions):
+    return f'page:{settings.PAGE_CACHE_RELEASE}:{request.path}' + ''.join(f':{v}' for v in versions)
+
+
+def _respond(request, body, content_type, etag):
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.PAGE_MAX_AGE)
+    return response
+
+
+def _entry(response):
+    """The cache entry for ``response``, or None if it must not be shared."""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    etag = '"%s"' % hashlib.md5(response.content, usedforsecurity=False).hexdigest()
+    return (response.content, response['Content-Type'], etag)
+
+
+def cached_page(*depends_on):
+    """Cache a view's whole GET response, keyed on the path and the versions of ``depends_on``.
+
+    Query strings are ignored, so campaign parameters share the entry.
+    Only plain 200 responses that set no cookies are stored. Works on sync
+    and async views; async views use the cache's async API.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                key = _page_key(request, [await aversion(model) for model in depends_on])
+                entry = await cache.aget(key)
+                if entry is None:
+                    with primary():
+                        response = await view(request, *args, **kwargs)
+                    entry = _entry(response)
+                    if entry is None:
+                        return response
+                    await cache.aset(key, entry, settings.PAGE_CACHE_TIMEOUT)
+                return _respond(request, *entry)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(request, *args, **kwargs)
+                key = _page_key(request, [version(model) for model in depends_on])
+                entry = cache.get(key)
+                if entry is None:
+                    with primary():
+                        response = view(request, *args, **kwargs)
+                    entry = _entry(response)
+                    if entry is None:
+                        return response
+                    cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+                return _respond(request, *entry)
+        return wrapper
+    return decorator
+
+
+def _blog_post_key(pk):
+    return f'page:{settings.PAGE_CACHE_RELEASE}:blog-post:{pk}'
+
+
+def cached_blog_post(request, pk):
+    """``(updated_at, html)`` for post ``pk``.
+
+    ``html`` is None when the page is not cached, and ``updated_at`` too
+    when the post does not exist. Kept on the request, since the
+    conditional headers and the view all ask for it.
+    """
+    entry = getattr(request, '_cached_blog_post', None)
+    if entry is None:
+        entry = cache.get(_blog_post_key(pk))
+        if entry is None:
+            with primary():
+                updated_at = BlogPost.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+            entry = (updated_at, None)
+        request._cached_blog_post = entry
+    return entry
+
+
+def blog_post_etag(request, id):
+    updated_at, _ = cached_blog_post(request, id)
+    if updated_at is None:
+        return None
+    return f'"blog-{id}-{settings.PAGE_CACHE_RELEASE}-{updated_at.timestamp():.6f}"'
+
+
+def blog_post_last_modified(request, id):
+    return cached_blog_post(request, id)[0]
+
+
+def cache_blog_post(post, html):
+    cache.set(_blog_post_key(post.pk), (post.updated_at, html), settings.PAGE_CACHE_TIMEOUT)
+
+
+def invalidate_blog_post(pk):
+    cache.delete(_blog_post_key(pk))
+
+
+def invalidate_image(model, pk):
+    """Retire the cached pages showing the image of ``model`` ``pk``.
+
+    Those are the services page for a service and the post's page for a
+    blog post. The gallery and blog list are rendered on every request.
+    """
+    invalidate(model)
+    if model is BlogPost:
+        invalidate_blog_post(pk)
@@ -0,0 +1,137 @@
+"""Keyset (cursor) pagination.
+
+Pages are fetched with a ``WHERE (key) < (cursor)`` predicate instead of an
+OFFSET, so every page costs the same regardless of how deep it is. Cursors
+are opaque URL-safe tokens holding the ordering key values of the first or
+last row on the current page.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def _encode(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode(token):
+    padded = token + '=' * (-len(token) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Paginate a queryset by a unique ordering such as ``('-submitted_at', '-id')``.
+
+    The last ordering field must be unique (normally the primary key) so
+    every row has a distinct cursor position.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.fields = [queryset.model._meta.get_field(name) for name, _ in self.keys]
+
+    def _cursor_for(self, obj):
+        return _encode([field.value_to_string(obj) for field in self.fields])
+
+    def _values_for(self, token):
+        values = _decode(token)
+        if len(values) != len(self.fields):
+            raise ValueError("Malformed cursor")
+        return [field.to_python(value) for field, value in zip(self.fields, values)]
+
+    def _seek(self, values, forward):
+        """Build the lexicographic predicate for rows after (or before) ``values``."""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _order(self, forward):
+        return [('-' if descending == forward else '') + name for name, descending in self.keys]
+
+    def page(self, after=None, before=None):
+        """Return the page following ``after``, preceding ``before``, or the first page.
+
+        Invalid cursors fall back to the first page.
+        """
+        forward = not before
+        queryset = self.queryset
+        token = after or before
+        if token:
+            try:
+                queryset = queryset.filter(self._seek(self._values_for(token), forward))
+            except (ValueError, TypeError, ValidationError):
+                token = None
+                forward = True
+                queryset = self.queryset
+
+        rows = list(queryset.order_by(*self._order(forward))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            has_next, has_previous = has_more, bool(token)
+        elif not has_more:
+            # Stepped back onto the first page; serve it full-sized
+            return self.page()
+        else:
+            rows.reverse()
+            has_next, has_previous = True, True
+
+        return KeysetPage(
+            rows,
+            self._cursor_for(rows[-1]) if rows and has_next else None,
+            self._cursor_for(rows[0]) if rows and has_previous else None,
+        )
+
+
+def cursor_querystring(params, **cursor):
+    """Re-encode request GET params with the pagination cursor replaced."""
+    query = params.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    for name, token in cursor.items():
+        query[name] = token
+    return query.urlencode()
+
+
+def capped_count(queryset, cap):
+    """Count rows up to ``cap``; returns ``(count, truncated)``.
+
+    The database stops scanning after ``cap + 1`` rows, so counting a broad
+    filter over a large table stays bounded.
+    """
+    count = queryset.order_by()[:cap + 1].count()
+    return min(count, cap), count > cap
@@ -0,0 +1,124 @@
+"""Token-bucket rate limiting backed by the configured cache.
+
+Each bucket is kept in GCRA form: a single integer, the bucket's
+"theoretical arrival time" in microseconds, stored in the cache. A request
+is admitted when that time is no more than ``burst - 1`` intervals ahead of
+now. Admitting a request adds one interval with an atomic ``incr``; a
+rejected request takes it back. There is no read-modify-write race between
+workers. The only non-atomic step is resetting an idle bucket to "now", and
+at worst that admits one extra request.
+
+    @rate_limit('chat', rate='30/m', burst=10)
+    def chat_ai(request): ...
+"""
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Buckets outlive their refill time so a flood cannot earn a fresh burst by
+# waiting for the key to expire
+KEY_TIMEOUT = 3600
+
+
+def parse_rate(rate):
+    """``'30/m'`` -> microseconds between tokens."""
+    count, _, period = rate.partition('/')
+    return int(PERIODS[period] * 1_000_000 / int(count))
+
+
+class TokenBucket:
+    """A bucket holding up to ``burst`` tokens, refilled at ``rate``."""
+
+    def __init__(self, rate, burst):
+        self.interval = parse_rate(rate)
+        self.tolerance = self.interval * (burst - 1)
+        self.timeout = max(KEY_TIMEOUT, math.ceil((self.tolerance + self.interval) / 1_000_000))
+
+    def take(self, key, now=None):
+        """Take a token. Returns 0 when admitted, else seconds until one is free."""
+        now = int((time.time() if now is None else now) * 1_000_000)
+        try:
+            arrival = cache.incr(key, self.interval) - self.interval
+        except ValueError:
+            # First request, or the key was evicted
+            if cache.add(key, now + self.interval, self.timeout):
+                return 0
+            arrival = cache.incr(key, self.interval) - self.interval
+        if arrival < now:
+            # Idle bucket: it is full, so restart the schedule from now
+            cache.set(key, now + self.interval, self.timeout)
+            return 0
+        wait = arrival - now - self.tolerance
+        if wait <= 0:
+            return 0
+        cache.decr(key, self.interval)
+        return max(1, math.ceil(wait / 1_000_000))
+
+
+_warned_unconfigured_proxy = False
+
+
+def client_ip(request):
+    """The client address, read from X-Forwarded-For behind RATELIMIT_PROXY_COUNT proxies."""
+    global _warned_unconfigured_proxy
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if not proxies and 'X-Forwarded-For' in request.headers and not _warned_unconfigured_proxy:
+        # Every client behind the proxy would share one bucket
+        _warned_unconfigured_proxy = True
+        logger.error("X-Forwarded-For received but RATELIMIT_PROXY_COUNT is 0: "
+                     "all clients are rate-limited as the proxy's address")
+    if proxies:
+        forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_many_requests(request, retry_after):
+    message = f"Too many requests. Please try again in {retry_after} seconds."
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.path.startswith('/api/'):
+        response = JsonResponse({'success': False, 'message': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(name, rate, burst=1, methods=('GET', 'POST')):
+    """Limit a view with a token bucket per client IP and one per session.
+
+    ``rate`` is ``'<tokens>/<s|m|h|d>'``, ``burst`` the bucket size. Only
+    ``methods`` are counted. The session bucket applies once the client has
+    a session. When the cache is unreachable, requests are let through.
+    """
+    bucket = TokenBucket(rate, burst)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and request.method in methods:
+                keys = [f'ratelimit:{name}:ip:{client_ip(request)}']
+                session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+                if session_key:
+                    keys.append(f'ratelimit:{name}:session:{session_key}')
+                now = time.time()
+                for key in keys:
+                    try:
+                        retry_after = bucket.take(key, now)
+                    except Exception as e:
+                        logger.error(f"Rate limiter unavailable: {str(e)}")
+                        break
+                    if retry_after:
+                        return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
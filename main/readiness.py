@@ -0,0 +1,117 @@
+"""Process-level schema readiness latch.
+
+The schema is probed once per process (from the WSGI/ASGI warm-up hook, or
+lazily on first use under runserver) and the result is cached so requests
+never pay for the check. Migrations are never run from inside a request;
+they run once per deploy before the workers start (see Procfile/build.sh).
+"""
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_ready = False
+_last_probe = 0.0
+
+
+def _required_tables():
+    """Database tables for every model in the main app."""
+    return {model._meta.db_table for model in apps.get_app_config('main').get_models()}
+
+
+def probe():
+    """Check the database for the main app's tables. Returns True when all exist."""
+    try:
+        existing = set(connection.introspection.table_names())
+    except DatabaseError as e:
+        logger.error(f"Schema readiness probe failed: {str(e)}")
+        return False
+    missing = _required_tables() - existing
+    if missing:
+        logger.warning(f"Schema not ready, missing tables: {', '.join(sorted(missing))}")
+        return False
+    return True
+
+
+def check_connections():
+    """Start-up self-check of this process's database connections.
+
+    Checks a connection out (from the pool when DATABASE_POOL is on), logs
+    how connections are reused, and on Postgres warns when the connections
+    all workers may hold exceed the server's max_connections.
+    """
+    pool = connection.settings_dict.get('OPTIONS', {}).get('pool')
+    per_process = pool['max_size'] if isinstance(pool, dict) else settings.WEB_THREADS
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            limit = None
+            if connection.vendor == 'postgresql':
+                cursor.execute('SHOW max_connections')
+                limit = int(cursor.fetchone()[0])
+    except DatabaseError as e:
+        logger.error(f"Database connection check failed: {str(e)}")
+        return False
+    if pool:
+        logger.info(f"Database connection pool ready, up to {per_process} connections per worker")
+    else:
+        logger.info(f"Database connections reused for {connection.settings_dict['CONN_MAX_AGE']}s")
+    needed = per_process * settings.WEB_CONCURRENCY
+    if limit is not None and needed > limit:
+        logger.warning(
+            f"{settings.WEB_CONCURRENCY} workers may open {needed} database connections "
+            f"but the server allows {limit}; lower WEB_THREADS or set DATABASE_MAX_CONNECTIONS"
+        )
+    return True
+
+
+def warm_up(close_connection=True):
+    """Probe the schema once at process start-up and latch the result.
+
+    At start-up (``close_connection``) the connection settings are checked
+    first. The probe's connection is closed afterwards by default so it is
+    not inherited by workers forked from a preloaded master.
+    """
+    global _ready, _last_probe
+    with _lock:
+        try:
+            if close_connection:
+                check_connections()
+            _ready = probe()
+        finally:
+            if close_connection:
+                connection.close()
+        _last_probe = time.monotonic()
+        if _ready:
+            logger.info("Database schema is ready")
+    return _ready
+
+
+def is_schema_ready():
+    """Return the cached readiness state.
+
+    Once the schema is ready the latch stays closed for the life of the
+    process. While it is not ready the probe is repeated at most once every
+    ``SCHEMA_READINESS_RETRY`` seconds so a worker recovers after the deploy's
+    ``migrate`` finishes without every request re-checking.
+    """
+    if _ready:
+        return True
+    retry = getattr(settings, 'SCHEMA_READINESS_RETRY', 5)
+    if _last_probe and time.monotonic() - _last_probe < retry:
+        return False
+    return warm_up(close_connection=False)
+
+
+def reset():
+    """Forget the cached state so the next call probes again."""
+    global _ready, _last_probe
+    with _lock:
+        _ready = False
+        _last_probe = 0.0
@@ -0,0 +1,401 @@
+"""In-process BM25 search over service descriptions and blog posts.
+
+The chat assistant uses this to answer with snippets of the site's own
+content. The index is built lazily on first use (or loaded from a snapshot
+written by ``manage.py build_chat_index``), kept current in this process by
+the save/delete signals in ``main.signals``, and rebuilt when another
+process bumps the shared version key in the cache.
+
+A published index is never modified: edits are applied to a copy, which
+then replaces it, so searches read it without locking. The lock only keeps
+rebuilds and edits in one thread at a time.
+"""
+import hashlib
+import heapq
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from django.urls import NoReverseMatch, reverse
+
+from .models import BlogPost, Service
+from .routers import primary
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+VERSION_KEY = 'chat-index:version'
+
+STOPWORDS = frozenset('''
+    a about above after again all also am an and any are as at be because been
+    before being below between both but by can could did do does doing down
+    during each few for from further had has have having he her here hers how
+    i if in into is it its just me more most my no nor not now of off on once
+    only or other our ours out over own same she should so some such than that
+    the their theirs them then there these they this those through to too
+    under until up very was we were what when where which while who whom why
+    will with would you your yours
+'''.split())
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_SENTENCE = re.compile(r'[^.!?\n]+[.!?]*')
+
+Document = namedtuple('Document', 'title url length terms sentences')
+Hit = namedtuple('Hit', 'key title url snippet score')
+
+_generations = count(1)
+
+
+def _stem(token):
+    """Fold plurals so "materials" and "material" share a term."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lower-cased, stemmed word tokens of ``text`` without stopwords."""
+    return [_stem(token) for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _sentences(text):
+    return tuple(sentence for sentence in (match.strip() for match in _SENTENCE.findall(text)) if sentence)
+
+
+def _snippet(sentences, terms, length):
+    """The sentence mentioning the most query terms, trimmed to ``length``."""
+    # Stems are prefixes of the words they came from, bar "-ies" plurals
+    pattern = re.compile(r'\b(?:%s)' % '|'.join(re.escape(term[:-1] if term.endswith('y') else term) for term in terms))
+    best = max(sentences, key=lambda sentence: len(set(pattern.findall(sentence.lower()))))
+    if len(best) > length:
+        best = best[:length].rsplit(' ', 1)[0] + '…'
+    return best
+
+
+class BM25Index:
+    """Inverted index scored with Okapi BM25.
+
+    Documents are keyed by ``(model label, pk)``. Adding a key that is
+    already indexed replaces it.
+
+    Each term's postings are turned into BM25 weights sorted best first the
+    first time the term is queried after a change, and queries walk those
+    lists with Fagin's threshold algorithm: they stop as soon as no unseen
+    document can beat the current top results, so a query rarely scores
+    more than a small fraction of the documents a common term appears in.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.documents = {}
+        self.total_length = 0
+        self.generation = next(_generations)
+        self._impacts = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_impacts'] = {}
+        return state
+
+    def copy(self):
+        """An independent index with the same documents, to edit while this one is searched."""
+        index = BM25Index(self.k1, self.b)
+        index.postings = {term: dict(posting) for term, posting in self.postings.items()}
+        index.documents = dict(self.documents)
+        index.total_length = self.total_length
+        return index
+
+    def _changed(self):
+        self._impacts.clear()
+        self.generation = next(_generations)
+
+    def add(self, key, title, text, url=None):
+        self.remove(key)
+        if not text.strip():
+            return
+        terms = Counter(tokenize(title))
+        terms.update(tokenize(text))
+        length = sum(terms.values())
+        self.documents[key] = Document(title, url, length, tuple(terms), _sentences(text))
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[key] = frequency
+        self.total_length += length
+        self._changed()
+
+    def remove(self, key):
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        for term in document.terms:
+            posting = self.postings[term]
+            del posting[key]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= document.length
+        self._changed()
+
+    def _impact(self, term):
+        """``(keys best first, key -> weight)`` for ``term``, idf included."""
+        impact = self._impacts.get(term)
+        if impact is None:
+            posting = self.postings[term]
+            n, df = len(self.documents), len(posting)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            k1, b, average = self.k1, self.b, self.total_length / n
+            documents = self.documents
+            weights = {
+                key: idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * documents[key].length / average))
+                for key, frequency in posting.items()
+            }
+            impact = self._impacts[term] = (sorted(weights, key=weights.__getitem__, reverse=True), weights)
+        return impact
+
+    def search(self, query, limit=3, snippet_length=240):
+        """Return up to ``limit`` hits for ``query``, best first."""
+        terms = {term for term in tokenize(query) if term in self.postings}
+        if not terms or limit < 1:
+            return []
+        lists = [self._impact(term) for term in terms]
+        weight_maps = [weights for _, weights in lists]
+        longest = max(len(ordered) for ordered, _ in lists)
+
+        top = []  # min-heap of (score, key)
+        seen = set()
+        for depth in range(longest):
+            threshold = 0.0
+            for ordered, weights in lists:
+                if depth >= len(ordered):
+                    continue
+                key = ordered[depth]
+                threshold += weights[key]
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = sum(weight_map.get(key, 0.0) for weight_map in weight_maps)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, key))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, key))
+            if len(top) == limit and top[0][0] >= threshold:
+                break
+
+        documents = self.documents
+        return [
+            Hit(key, documents[key].title, documents[key].url,
+                _snippet(documents[key].sentences, terms, snippet_length), score)
+            for score, key in sorted(top, reverse=True)
+        ]
+
+
+def _blog_url(pk):
+    try:
+        return reverse('blog_detail', args=[pk])
+    except NoReverseMatch:
+        return None
+
+
+def _service_url():
+    try:
+        return reverse('services')
+    except NoReverseMatch:
+        return None
+
+
+def index_service(index, service):
+    # An unlisted service has no text, so add() leaves it out
+    text = service.description if service.listed else ''
+    index.add(('service', service.pk), service.title, text, _service_url())
+
+
+def index_blog_post(index, post):
+    index.add(('blogpost', post.pk), post.title, post.content, _blog_url(post.pk))
+
+
+def build_index():
+    """Index every service and blog post from the database."""
+    index = BM25Index()
+    for service in Service.objects.filter(listed=True).only('title', 'description', 'listed').iterator():
+        index_service(index, service)
+    for post in BlogPost.objects.only('title', 'content').iterator():
+        index_blog_post(index, post)
+    return index
+
+
+def fingerprint():
+    """Summary of the indexed content, to spot a stale snapshot.
+
+    Blog posts are summarised by count, highest pk and latest
+    ``updated_at``. Services have no modification time but are few, so
+    their indexed fields are hashed.
+    """
+    services = hashlib.sha256()
+    for row in Service.objects.order_by('pk').values_list('pk', 'title', 'description', 'listed').iterator():
+        services.update(repr(row).encode())
+    posts = BlogPost.objects.aggregate(rows=Count('pk'), last=Max('pk'), updated=Max('updated_at'))
+    return services.hexdigest(), tuple(posts.values())
+
+
+def save_snapshot(index, path=None):
+    """Atomically write ``index`` to the snapshot file."""
+    path = path or settings.CHAT_INDEX_SNAPSHOT
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as handle:
+        pickle.dump({'format': SNAPSHOT_FORMAT, 'fingerprint': fingerprint(), 'index': index}, handle)
+    os.replace(handle.name, path)
+
+
+def load_snapshot(path=None):
+    """Return the snapshot's index, or None if it is missing or stale."""
+    path = path or settings.CHAT_INDEX_SNAPSHOT
+    try:
+        with open(path, 'rb') as handle:
+            snapshot = pickle.load(handle)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable chat index snapshot: {str(e)}")
+        return None
+    if snapshot.get('format') != SNAPSHOT_FORMAT or snapshot.get('fingerprint') != fingerprint():
+        return None
+    index = snapshot['index']
+    index.generation = next(_generations)
+    return index
+
+
+def discard_snapshot(path=None):
+    try:
+        os.remove(path or settings.CHAT_INDEX_SNAPSHOT)
+    except FileNotFoundError:
+        pass
+
+
+_lock = threading.RLock()
+_index = None
+_version = None
+_last_check = 0.0
+
+
+def _shared_version():
+    cache.add(VERSION_KEY, 1, None)
+    return cache.get(VERSION_KEY, 1)
+
+
+def needs_refresh():
+    """Whether the next get_index() call has to touch the database."""
+    global _last_check
+    if _index is None:
+        return True
+    now = time.monotonic()
+    if now - _last_check < settings.CHAT_INDEX_CHECK_INTERVAL:
+        return False
+    if _shared_version() == _version:
+        _last_check = now
+        return False
+    return True
+
+
+def get_index():
+    """Return this process's index, loading or rebuilding it when needed."""
+    global _index, _version, _last_check
+    if not needs_refresh():
+        return _index
+    with _lock:
+        _last_check = time.monotonic()
+        version = _shared_version()
+        if _index is not None and version == _version:
+            return _index
+        try:
+            with primary():
+                index = load_snapshot() if _index is None else None
+                if index is None:
+                    started = time.perf_counter()
+                    index = build_index()
+                    logger.info(f"Built chat index of {len(index)} documents in {time.perf_counter() - started:.3f}s")
+                    if _index is None:
+                        save_snapshot(index)
+        except (DatabaseError, OSError) as e:
+            logger.error(f"Error building chat index: {str(e)}")
+            return _index or BM25Index()
+        _index, _version = index, version
+        return _index
+
+
+def search(query, limit=None):
+    """Top matching snippets for ``query`` (see BM25Index.search)."""
+    return get_index().search(query, limit or settings.CHAT_SNIPPET_COUNT)
+
+
+def generation():
+    """Changes whenever the searchable content does, for keying cached answers."""
+    return get_index().generation
+
+
+def _publish(index):
+    """Swap in the edited ``index``, tell other processes to rebuild, and drop the snapshot.
+
+    The new shared version is only adopted if it directly follows the one
+    this process's index was built at. Otherwise another process changed
+    something in between, which ``index`` lacks, and the next get_index()
+    rebuilds.
+    """
+    global _index, _version, _last_check
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+        version = None
+    _index = index
+    if index is None or version is None or version != (_version or 0) + 1:
+        _last_check = 0.0
+    else:
+        _version = version
+    discard_snapshot()
+
+
+def update(instance):
+    """Re-index a saved Service or BlogPost."""
+    with _lock:
+        index = None
+        if _index is not None:
+            index = _index.copy()
+            if isinstance(instance, Service):
+                index_service(index, instance)
+            else:
+                index_blog_post(index, instance)
+        _publish(index)
+
+
+def remove(model, pk):
+    """Drop a deleted Service or BlogPost from the index."""
+    with _lock:
+        index = None
+        if _index is not None:
+            index = _index.copy()
+            index.remove((model._meta.model_name, pk))
+        _publish(index)
+
+
+def reset():
+    """Forget the loaded index so the next call loads it again."""
+    global _index, _version, _last_check
+    with _lock:
+        _index, _version, _last_check = None, None, 0.0
@@ -0,0 +1,87 @@
+"""Primary/replica database routing.
+
+Reads of the main app's models go to one of the read replicas in
+DATABASE_REPLICAS, picked at random per query; writes, and every other
+app's tables (sessions, auth, admin), stay on ``default``. Reads stay on
+the primary as well:
+
+* for the whole of a POST or other unsafe request, so the lookups a view
+  makes before it writes see current rows;
+* for the rest of a request once it has written, and inside transactions;
+* for DATABASE_REPLICA_PIN_SECONDS after a client's last write, through a
+  cookie set by ``main.middleware.ReplicaPinningMiddleware``, so the page
+  a booking or dashboard edit redirects to shows it even while the
+  replicas lag;
+* inside ``primary()`` blocks. Caches filled right after an invalidation
+  use these, because an entry built from a lagging replica would outlive
+  the lag.
+
+Without DATABASE_REPLICAS every query goes to ``default``.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_APPS = {'main'}
+
+# Set up per request by the middleware: {'pinned': bool, 'wrote': bool}
+_state = ContextVar('replica_routing', default=None)
+
+
+def begin_request(pinned):
+    return _state.set({'pinned': pinned, 'wrote': False})
+
+
+def end_request(token):
+    """Forget the request's state; returns whether it wrote."""
+    state = _state.get()
+    _state.reset(token)
+    return state['wrote']
+
+
+@contextmanager
+def primary():
+    """Send the reads in this block to the primary."""
+    state = _state.get()
+    if state is None:
+        token = _state.set({'pinned': True, 'wrote': False})
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+    pinned = state['pinned']
+    state['pinned'] = True
+    try:
+        yield
+    finally:
+        state['pinned'] = pinned
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label not in ROUTED_APPS:
+            return None
+        state = _state.get()
+        if state is not None and (state['pinned'] or state['wrote']):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label in ROUTED_APPS:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
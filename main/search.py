@@ -0,0 +1,108 @@
+"""Full-text search over consultations for the dashboard.
+
+SQLite uses an FTS5 shadow table kept in sync by triggers; Postgres uses a
+GIN-indexed ``tsvector`` expression. Both index the name and email words
+for prefix matching, and the phone number as digits only (full and
+national form) so "+91 63017-39482", "6301739482" and "6301" all match.
+Service titles are matched against the small Service table and joined by
+``service_id``. Other backends, or SQLite builds without FTS5, fall back to
+``icontains``. See migrations 0007 and 0008 for the index definitions.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Service
+
+FTS_TABLE = 'main_consultation_fts'
+
+# Phone digits without separators, and the trailing ten digits (national number)
+PG_PHONE = "regexp_replace(phone, '[^0-9]', '', 'g') || ' ' || right(regexp_replace(phone, '[^0-9]', '', 'g'), 10)"
+
+
+def pg_document(columns):
+    """``to_tsvector`` over ``columns``, with the phone number's digits last.
+
+    Migration 0008 builds ``consult_search_idx`` from a copy of this
+    expression; the two must stay identical, as Postgres only uses an
+    expression index for a query whose expression is the same.
+    """
+    terms = [column for column in columns if column != 'phone']
+    if 'phone' in columns:
+        terms.append(PG_PHONE)
+    return "to_tsvector('simple', " + " || ' ' || ".join(terms) + ")"
+
+
+PG_DOCUMENT = pg_document(['name', 'email', 'phone'])
+
+_has_fts = {}
+
+
+def _sqlite_fts_available(connection):
+    """Whether the FTS5 table exists on this connection's database (checked once)."""
+    alias = connection.alias
+    if alias not in _has_fts:
+        _has_fts[alias] = FTS_TABLE in connection.introspection.table_names()
+    return _has_fts[alias]
+
+
+def _terms(query):
+    """Whitespace-separated words that contain something indexable."""
+    return [term for term in query.split() if re.search(r'\w', term)]
+
+
+def _phone_digits(query):
+    """Digits of the query when it looks like a phone number, else None."""
+    if re.fullmatch(r'[\d\s()+\-./]+', query):
+        digits = re.sub(r'\D', '', query)
+        if len(digits) >= 3:
+            return digits
+    return None
+
+
+def fts5_query(query):
+    """Build an FTS5 MATCH expression: every word as a quoted prefix term."""
+    words = ' AND '.join('"{}"*'.format(term.replace('"', '""')) for term in _terms(query))
+    digits = _phone_digits(query)
+    if digits:
+        return f'({words}) OR phone : "{digits}"*'
+    return words
+
+
+def tsquery(query):
+    """Build a Postgres tsquery string: every word as a quoted prefix lexeme."""
+    lexemes = ["'{}':*".format(term.replace('\\', '\\\\').replace("'", "''")) for term in _terms(query)]
+    words = ' & '.join(lexemes)
+    digits = _phone_digits(query)
+    if digits:
+        return f"({words}) | '{digits}':*"
+    return words
+
+
+def search_consultations(queryset, query):
+    """Filter a Consultation queryset to rows matching ``query``."""
+    query = query.strip()
+    if not _terms(query):
+        return queryset
+
+    by_service = Q(service_id__in=Service.objects.filter(title__icontains=query).values('id'))
+
+    # Pin the database (a replica, possibly) so the checks and query agree
+    queryset = queryset.using(queryset.db)
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite' and _sqlite_fts_available(connection):
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts5_query(query)])
+        return queryset.filter(Q(pk__in=matches) | by_service)
+
+    if connection.vendor == 'postgresql':
+        matches = RawSQL(f"{PG_DOCUMENT} @@ to_tsquery('simple', %s)", [tsquery(query)], output_field=BooleanField())
+        return queryset.filter(Q(matches) | by_service)
+
+    return queryset.filter(
+        Q(name__icontains=query) |
+        Q(email__icontains=query) |
+        Q(phone__icontains=query) |
+        by_service
+    )
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalogue, images, pages, retrieval, sqlite, stats
+from .models import Consultation, Service, GalleryImage, BlogPost
+
+COUNTED_MODELS = (Consultation, Service, GalleryImage, BlogPost)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    sqlite.configure(connection)
+
+
+@receiver(post_save)
+def count_created(sender, instance, created, **kwargs):
+    if created and sender in COUNTED_MODELS:
+        transaction.on_commit(lambda: stats.adjust(sender, 1))
+
+
+@receiver(post_delete)
+def count_deleted(sender, instance, **kwargs):
+    if sender in COUNTED_MODELS:
+        transaction.on_commit(lambda: stats.adjust(sender, -1))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def catalogue_service_changed(sender, instance, **kwargs):
+    transaction.on_commit(catalogue.invalidate)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_pages_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: pages.invalidate(sender))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=BlogPost)
+def chat_index_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: retrieval.update(instance))
+
+
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=BlogPost)
+def chat_index_deleted(sender, instance, **kwargs):
+    # delete() clears instance.pk before on_commit callbacks run
+    pk = instance.pk
+    transaction.on_commit(lambda: retrieval.remove(sender, pk))
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def blog_post_page_changed(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: pages.invalidate_blog_post(pk))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_save, sender=BlogPost)
+def image_saved(sender, instance, **kwargs):
+    stale = images.stale_variants(instance)
+    if stale:
+        pk = instance.pk
+        transaction.on_commit(lambda: images.discard(sender, pk, stale))
+    if images.needs_variants(instance):
+        transaction.on_commit(lambda: images.schedule(instance))
+
+
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=GalleryImage)
+@receiver(post_delete, sender=BlogPost)
+def image_deleted(sender, instance, **kwargs):
+    record = instance.image_variants or {}
+    if record.get('source'):
+        pk = instance.pk
+        transaction.on_commit(lambda: images.discard(sender, pk, record))
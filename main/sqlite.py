@@ -0,0 +1,52 @@
+"""SQLite tuning for running under several gunicorn workers.
+
+Every new SQLite connection gets the PRAGMAs in SQLITE_PRAGMAS (applied by
+the ``connection_created`` receiver in ``main.signals``). The defaults
+switch the database to write-ahead logging, so readers and the writer no
+longer block each other. They wait up to ``busy_timeout`` ms for the write
+lock instead of failing with "database is locked", sync less often, and
+read through a memory map and a larger page cache.
+
+A deferred transaction that reads before it writes cannot wait for the
+lock when it tries to write: SQLite fails it at once to avoid a deadlock.
+``write_transaction()`` makes a block, e.g. a booking insert, take the
+write lock when it begins (``BEGIN IMMEDIATE``), so it queues for
+busy_timeout instead. Other transactions stay deferred, so read-only
+``atomic()`` blocks and session saves do not hold the write lock.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+def configure(connection):
+    """Apply SQLITE_PRAGMAS to a newly opened SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@contextmanager
+def write_transaction(using=None):
+    """``transaction.atomic()`` that begins with SQLite's write lock held.
+
+    Nested blocks, and other databases, get a plain ``atomic()``.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    # transaction_mode is read from OPTIONS on connect, so connect first
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
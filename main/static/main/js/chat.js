@@ -101,6 +101,56 @@
         chatHistory.push({ text, isBot });
     }
     
+    // Add an empty bot message that fills in as streamed chunks arrive
+    function addStreamingMessage() {
+        const messagesContainer = document.getElementById('chat-messages');
+        const messageDiv = document.createElement('div');
+        messageDiv.className = 'chat-message bot-message';
+        messageDiv.innerHTML = '<div class="message-avatar">🌿</div><div class="message-content"></div>';
+        messagesContainer.appendChild(messageDiv);
+        
+        const contentDiv = messageDiv.querySelector('.message-content');
+        let text = '';
+        return {
+            append(chunk) {
+                text += chunk;
+                contentDiv.innerHTML = formatMessage(text);
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            },
+            finish() {
+                chatHistory.push({ text, isBot: true });
+                return text;
+            }
+        };
+    }
+    
+    // Read a text/event-stream response, calling onEvent(name, data) per event
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let name = 'message';
+                let data = '';
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) name = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                if (data) onEvent(name, JSON.parse(data));
+            }
+        }
+    }
+    
     // Format bot message (support line breaks and links)
     function formatMessage(text) {
         // Convert line breaks to <br>
@@ -140,10 +190,13 @@
         messagesContainer.scrollTop = messagesContainer.scrollHeight;
         
         try {
+            // Browsers that can read streams ask for the answer as events
+            const canStream = !!(window.ReadableStream && window.TextDecoder);
             const csrftoken = getCSRFToken();
             const response = await fetch('/api/chat/', {
                 method: 'POST',
                 headers: {
+                    'Accept': canStream ? 'text/event-stream' : 'application/json',
                     'Content-Type': 'application/json',
                     'X-CSRFToken': csrftoken || '',
                     'X-Requested-With': 'XMLHttpRequest'
@@ -152,13 +205,42 @@
                 credentials: 'same-origin'
             });
             
-            // Remove typing indicator
-            typingDiv.remove();
+            if (response.status === 429) {
+                typingDiv.remove();
+                const data = await response.json();
+                addMessage(data.message, true);
+                return;
+            }
             
             if (!response.ok) {
                 throw new Error('Network response was not ok');
             }
             
+            const contentType = response.headers.get('Content-Type') || '';
+            if (canStream && response.body && contentType.includes('text/event-stream')) {
+                let botMessage = null;
+                await readEventStream(response, (name, data) => {
+                    if (name === 'message' && data.chunk) {
+                        if (!botMessage) {
+                            // Remove typing indicator once the first line arrives
+                            typingDiv.remove();
+                            botMessage = addStreamingMessage();
+                        }
+                        botMessage.append(data.chunk);
+                    }
+                });
+                typingDiv.remove();
+                if (botMessage) {
+                    botMessage.finish();
+                } else {
+                    addMessage('I apologize, but I encountered an error. Please try again or contact us directly.', true);
+                }
+                return;
+            }
+            
+            // Remove typing indicator
+            typingDiv.remove();
+            
             const data = await response.json();
             
             if (data.success && data.response) {
@@ -0,0 +1,124 @@
+"""Build-time optimisation of the bundled images in main/static/main/images.
+
+``manage.py optimize_images`` (run by build.sh before collectstatic) writes
+AVIF, WebP and JPEG copies of every image at each of STATIC_IMAGE_WIDTHS
+narrower than the original, plus AVIF and WebP at the original width, into
+``main/images/optimized/``. ``manifest.json`` next to them maps each
+original to its variants and pixel sizes, and records a content hash so
+unchanged images are skipped on the next build. The ``{% picture %}`` tag
+reads the manifest; without one it renders the original.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from PIL import Image, ImageOps, features
+
+SOURCE_PREFIX = 'main/images/'
+OUTPUT_PREFIX = 'main/images/optimized/'
+MANIFEST_NAME = OUTPUT_PREFIX + 'manifest.json'
+SOURCE_DIR = os.path.join(settings.BASE_DIR, 'main', 'static', *SOURCE_PREFIX.split('/'))
+OUTPUT_DIR = os.path.join(settings.BASE_DIR, 'main', 'static', *OUTPUT_PREFIX.split('/'))
+EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+FORMATS = {
+    'avif': ('AVIF', {'quality': 50}),
+    'webp': ('WEBP', {'quality': 75, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+
+def available_formats():
+    """Output formats this Pillow build can encode (AVIF needs libavif)."""
+    return [extension for extension in FORMATS if extension == 'jpg' or features.check(extension)]
+
+
+def content_hash(path):
+    with open(path, 'rb') as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+
+def _widths(width):
+    return [w for w in settings.STATIC_IMAGE_WIDTHS if w < width]
+
+
+def optimize(filename, formats):
+    """Write ``filename``'s variants and return its manifest entry (without the hash)."""
+    with Image.open(os.path.join(SOURCE_DIR, filename)) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+    width, height = image.size
+    root = os.path.splitext(filename)[0]
+    variants = {extension: [] for extension in formats}
+    for target in _widths(width) + [width]:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for extension in formats:
+            if extension == 'jpg' and target == width:
+                continue  # The original is the full-width JPEG
+            format, options = FORMATS[extension]
+            name = f'{root}.w{target}.{extension}'
+            resized.save(os.path.join(OUTPUT_DIR, name), format, **options)
+            variants[extension].append({'path': OUTPUT_PREFIX + name, 'width': target, 'height': resized.size[1]})
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+def read_manifest(path=None):
+    try:
+        with open(path or os.path.join(OUTPUT_DIR, 'manifest.json')) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def build(force=False, workers=4):
+    """Optimise new or changed images and rewrite the manifest.
+
+    Returns ``(optimised, skipped, removed)`` lists of original paths.
+    """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    formats = available_formats()
+    previous = read_manifest()
+    manifest, pending, skipped = {}, {}, []
+    for filename in sorted(os.listdir(SOURCE_DIR)):
+        if not filename.lower().endswith(EXTENSIONS):
+            continue
+        key = SOURCE_PREFIX + filename
+        digest = content_hash(os.path.join(SOURCE_DIR, filename))
+        entry = previous.get(key)
+        if (
+            not force and entry and entry['hash'] == digest and set(entry['variants']) == set(formats)
+            and all(os.path.exists(os.path.join(OUTPUT_DIR, os.path.basename(variant['path'])))
+                    for variants in entry['variants'].values() for variant in variants)
+        ):
+            manifest[key] = entry
+            skipped.append(key)
+        else:
+            pending[key] = (filename, digest)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda item: optimize(item[0], formats), pending.values())
+        for (key, (_, digest)), entry in zip(pending.items(), results):
+            manifest[key] = {'hash': digest, **entry}
+
+    # Drop variants of originals that were removed or re-encoded
+    wanted = {os.path.basename(v['path']) for e in manifest.values() for vs in e['variants'].values() for v in vs}
+    for name in os.listdir(OUTPUT_DIR):
+        if name != 'manifest.json' and name not in wanted:
+            os.remove(os.path.join(OUTPUT_DIR, name))
+
+    with open(os.path.join(OUTPUT_DIR, 'manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    load_manifest.cache_clear()
+    return list(pending), skipped, sorted(set(previous) - set(manifest))
+
+
+@lru_cache(maxsize=None)
+def load_manifest():
+    """The manifest as found by the staticfiles finders, read once per process."""
+    path = finders.find(MANIFEST_NAME)
+    return read_manifest(path) if path else {}
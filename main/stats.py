@@ -0,0 +1,66 @@
+"""Cached dashboard statistics.
+
+The four dashboard totals live in the cache and are adjusted in place by
+the post_save/post_delete receivers in ``main.signals``, so a dashboard
+render costs one ``get_many`` instead of four COUNT(*) queries. Writes that
+bypass signals (``bulk_create``, raw SQL) are corrected when the entries
+expire after ``STATS_CACHE_TIMEOUT`` seconds.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from .models import Consultation, Service, GalleryImage, BlogPost
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'dashboard-stats:'
+
+COUNTERS = {
+    'total_bookings': Consultation,
+    'total_services': Service,
+    'total_images': GalleryImage,
+    'total_posts': BlogPost,
+}
+
+
+def _key(name):
+    return KEY_PREFIX + name
+
+
+def get_dashboard_stats():
+    """Return all four totals, counting only the ones missing from the cache."""
+    cached = cache.get_many([_key(name) for name in COUNTERS])
+    stats = {}
+    missing = {}
+    for name, model in COUNTERS.items():
+        if _key(name) in cached:
+            stats[name] = cached[_key(name)]
+            continue
+        try:
+            stats[name] = model.objects.count()
+        except DatabaseError as e:
+            logger.error(f"Error counting {model._meta.verbose_name_plural}: {str(e)}")
+            stats[name] = 0
+            continue
+        missing[_key(name)] = stats[name]
+    if missing:
+        cache.set_many(missing, settings.STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def adjust(model, delta):
+    """Add ``delta`` to the cached total for ``model`` if it is cached."""
+    for name, counted in COUNTERS.items():
+        if counted is model:
+            try:
+                cache.incr(_key(name), delta)
+            except ValueError:
+                # Not cached; the next read counts from the database
+                pass
+
+
+def clear():
+    cache.delete_many([_key(name) for name in COUNTERS])
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.html import format_html
+
+from main.idempotency import FIELD, new_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_key_field():
+    """Hidden input carrying a fresh idempotency key for the form it is rendered in."""
+    return format_html('<input type="hidden" name="{}" value="{}">', FIELD, new_key())
@@ -0,0 +1,65 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from main.images import srcset, variant_name
+from main.static_images import load_manifest
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(obj, sizes='100vw', alt=''):
+    """Lazy-loaded ``<picture>`` for ``obj.image`` with WebP and JPEG width variants.
+
+    Falls back to a plain lazy ``<img>`` of the original until the variants
+    recorded in ``obj.image_variants`` match the current image.
+    """
+    image = obj.image
+    if not image:
+        return ''
+    record = obj.image_variants or {}
+    if record.get('source') != image.name or not record.get('sizes'):
+        return format_html(
+            '<img src="{}" alt="{}" loading="lazy" decoding="async">',
+            image.url, alt,
+        )
+    # The largest variant is the fallback src and sets the aspect ratio
+    width, height = record['sizes'][-1]
+    fallback = image.storage.url(variant_name(record['source'], width, 'jpg'))
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="lazy" decoding="async">'
+        '</picture>',
+        srcset(image, record, 'webp'), sizes,
+        fallback, srcset(image, record, 'jpg'), sizes, width, height, alt,
+    )
+
+
+def _static_srcset(variants):
+    return ', '.join(f"{static(variant['path'])} {variant['width']}w" for variant in variants)
+
+
+@register.simple_tag
+def picture(path, alt='', sizes='100vw', loading='lazy'):
+    """``<picture>`` for a bundled static image using the optimize_images manifest.
+
+    Offers AVIF and WebP sources and resized JPEGs alongside the original;
+    renders a plain ``<img>`` when the image has not been optimised.
+    """
+    entry = load_manifest().get(path)
+    if entry is None:
+        return format_html('<img src="{}" alt="{}" loading="{}" decoding="async">', static(path), alt, loading)
+    width, height = entry['width'], entry['height']
+    jpegs = _static_srcset(entry['variants'].get('jpg', []))
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((extension, _static_srcset(variants), sizes)
+         for extension, variants in sorted(entry['variants'].items()) if extension != 'jpg' and variants),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}" decoding="async"></picture>',
+        sources, static(path), f'{jpegs}, {static(path)} {width}w' if jpegs else f'{static(path)} {width}w',
+        sizes, width, height, alt, loading,
+    )
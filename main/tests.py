@@ -1,3 +1,1134 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from main import booking_queue, catalogue, chat, checks, images, pages, ratelimit, retrieval, search
+from main.catalogue import lookup_service
+from main.intents import HashedNgramClassifier
+from main.middleware import ReplicaPinningMiddleware
+from main.routers import PrimaryReplicaRouter, primary
+from main.sqlite import write_transaction
+from main.stats import get_dashboard_stats
+from main.pagination import KeysetPaginator
+from main.models import BlogPost, Consultation, GalleryImage, IdempotencyKey, Service, make_excerpt
+
+
+def queued_booking(service_id, **fields):
+    booking = {
+        'name': 'Ada Lovelace',
+        'email': 'ada@example.com',
+        'phone': '0712345678',
+        'service_id': service_id,
+        'appointment_date': date(2030, 1, 15),
+        'reference': booking_queue.new_reference(),
+    }
+    booking.update(fields)
+    return booking
+
+
+class BookingQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.service = Service.objects.create(title='Garden Design', description='Planting plans')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = override_settings(BOOKING_QUEUE_DIR=self.directory.name, BOOKING_QUEUE_BATCH_SIZE=10)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def journal(self, bookings):
+        journal = booking_queue.Journal.create(self.directory.name)
+        self.addCleanup(journal.delete)
+        for booking in bookings:
+            # Serialised the way enqueue() writes them
+            journal.append(booking)
+        return journal
+
+    def dead_letters(self):
+        path = os.path.join(self.directory.name, booking_queue.DEAD_LETTER)
+        if not os.path.exists(path):
+            return []
+        with open(path) as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_replay_inserts_batch(self):
+        bookings = [queued_booking(self.service.pk) for _ in range(3)]
+        journal = self.journal(bookings)
+
+        self.assertEqual(booking_queue.replay(journal), 3)
+        self.assertEqual(Consultation.objects.count(), 3)
+        # Replaying again finds nothing past the offset
+        self.assertEqual(booking_queue.replay(journal), 0)
+
+    def test_replay_skips_bookings_already_inserted(self):
+        bookings = [queued_booking(self.service.pk) for _ in range(3)]
+        journal = self.journal(bookings)
+        booking_queue.insert(bookings[:1])
+
+        self.assertEqual(booking_queue.replay(journal), 2)
+        self.assertEqual(Consultation.objects.count(), 3)
+
+    def test_poisoned_batch_dead_letters_only_the_bad_booking(self):
+        poison = queued_booking(self.service.pk + 1000)
+        bookings = [queued_booking(self.service.pk), poison, queued_booking(self.service.pk)]
+        journal = self.journal(bookings)
+
+        with self.assertLogs('main.booking_queue', 'ERROR'):
+            self.assertEqual(booking_queue.replay(journal), 2)
+        self.assertEqual(
+            set(Consultation.objects.values_list('reference', flat=True)),
+            {bookings[0]['reference'], bookings[2]['reference']},
+        )
+        dead = self.dead_letters()
+        self.assertEqual([record['booking']['reference'] for record in dead], [poison['reference']])
+        self.assertIn('IntegrityError', dead[0]['error'])
+        # The batch is done with: the queue moves on past it
+        self.assertEqual(journal.read_offset(), journal.size())
+        self.assertEqual(booking_queue.replay(journal), 0)
+
+    def test_enqueue_rejects_invalid_booking(self):
+        with self.assertRaises(ValidationError):
+            booking_queue.enqueue(queued_booking(self.service.pk, email='not an email'))
+        with self.assertRaises(ValidationError):
+            booking_queue.enqueue(queued_booking(self.service.pk, phone='0' * 21))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class IdempotentContactTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = Service.objects.create(title='Garden Design', description='Planting plans')
+        self.form = {
+            'name': 'Ada Lovelace',
+            'email': 'ada@example.com',
+            'phone': '0712345678',
+            'service': str(self.service.pk),
+            'appointment_date': '2030-01-15',
+        }
+
+    def book(self, key, **fields):
+        return self.client.post(
+            '/contact/', {**self.form, **fields},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_response(self):
+        first = self.book('key-1')
+        second = self.book('key-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['reference'], first.json()['reference'])
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    def test_key_reused_for_different_submission(self):
+        self.book('key-1')
+        response = self.book('key-1', name='Grace Hopper')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT=0)
+    def test_duplicate_while_in_flight(self):
+        IdempotencyKey.objects.create(
+            scope='contact', key='key-1', fingerprint='',
+            expires_at=timezone.now() + timedelta(minutes=1),
+        )
+        response = self.book('key-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(Consultation.objects.count(), 0)
+
+    def test_rejected_form_is_not_stored(self):
+        self.assertEqual(self.book('key-1', email='').status_code, 400)
+        response = self.book('key-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    def test_expired_key_is_reclaimed(self):
+        IdempotencyKey.objects.create(
+            scope='contact', key='key-1', fingerprint='', status=200,
+            content=b'{}', content_type='application/json',
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        response = self.book('key-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    @override_settings(RATELIMIT_ENABLED=True)
+    def test_replays_are_not_rate_limited(self):
+        self.book('key-1')
+        for _ in range(10):
+            self.assertEqual(self.book('key-1').status_code, 200)
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    @override_settings(RATELIMIT_ENABLED=True)
+    def test_rate_limited_request_writes_nothing(self):
+        for n in range(5):
+            self.assertEqual(self.book(f'key-{n}').status_code, 200)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.book('key-5')
+
+        self.assertEqual(response.status_code, 429)
+        writes = [query['sql'] for query in queries if not query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertEqual(writes, [])
+        self.assertFalse(IdempotencyKey.objects.filter(key='key-5').exists())
+        # Retries of the admitted bookings are still answered
+        self.assertEqual(self.book('key-0')['Idempotent-Replayed'], 'true')
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_bucket_admits_burst_then_refills(self):
+        bucket = ratelimit.TokenBucket('1/s', burst=3)
+        now = 1_000_000.0
+
+        self.assertEqual([bucket.take('bucket', now) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(bucket.take('bucket', now), 1)
+        # Rejected requests do not push the refill back
+        self.assertEqual(bucket.take('bucket', now + 0.5), 1)
+        self.assertEqual(bucket.take('bucket', now + 1), 0)
+        self.assertEqual(bucket.take('bucket', now + 1), 1)
+        # Idle for the whole burst: full again
+        self.assertEqual([bucket.take('bucket', now + 10) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(bucket.take('bucket', now + 10), 1)
+
+    def test_wait_is_rounded_up_to_seconds(self):
+        bucket = ratelimit.TokenBucket('2/m', burst=1)
+
+        self.assertEqual(bucket.take('bucket', 0), 0)
+        self.assertEqual(bucket.take('bucket', 0), 30)
+        self.assertEqual(bucket.take('bucket', 29.5), 1)
+        self.assertEqual(bucket.take('bucket', 30), 0)
+
+    def test_client_ip_behind_proxies(self):
+        request = self.factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4, 10.0.0.1')
+
+        with override_settings(RATELIMIT_PROXY_COUNT=1):
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+        with override_settings(RATELIMIT_PROXY_COUNT=2):
+            self.assertEqual(ratelimit.client_ip(request), '1.2.3.4')
+        with override_settings(RATELIMIT_PROXY_COUNT=5):
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.2')
+
+    @override_settings(RATELIMIT_PROXY_COUNT=0)
+    def test_forwarded_header_without_proxy_count_is_reported(self):
+        request = self.factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='1.2.3.4')
+
+        with mock.patch.object(ratelimit, '_warned_unconfigured_proxy', False):
+            with self.assertLogs('main.ratelimit', 'ERROR'):
+                self.assertEqual(ratelimit.client_ip(request), '10.0.0.2')
+
+    @override_settings(RATELIMIT_ENABLED=True, RATELIMIT_PROXY_COUNT=0)
+    def test_view_answers_429_once_bucket_is_empty(self):
+        view = ratelimit.rate_limit('test', rate='1/m', burst=2, methods=('POST',))(lambda request: HttpResponse())
+
+        statuses = [view(self.factory.post('/')).status_code for _ in range(3)]
+        response = view(self.factory.post('/'))
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        # Other clients and uncounted methods are unaffected
+        self.assertEqual(view(self.factory.post('/', REMOTE_ADDR='10.0.0.9')).status_code, 200)
+        self.assertEqual(view(self.factory.get('/')).status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        service = Service.objects.create(title='Garden Design', description='Planting plans')
+        Consultation.objects.bulk_create([
+            Consultation(**queued_booking(service.pk, name=f'Client {n}')) for n in range(7)
+        ])
+        # Bookings flushed in one batch share a submission time
+        Consultation.objects.update(submitted_at=timezone.now())
+        self.ids = list(Consultation.objects.order_by('-id').values_list('id', flat=True))
+        self.paginator = KeysetPaginator(Consultation.objects.all(), ('-submitted_at', '-id'), 3)
+
+    def ids_on(self, page):
+        return [booking.id for booking in page]
+
+    def test_forward_pages_with_tied_timestamps(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next:
+            pages.append(self.paginator.page(after=pages[-1].next_cursor))
+
+        self.assertEqual([self.ids_on(page) for page in pages], [self.ids[0:3], self.ids[3:6], self.ids[6:]])
+        self.assertFalse(pages[0].has_previous)
+        self.assertTrue(pages[-1].has_previous)
+
+    def test_backward_pages_with_tied_timestamps(self):
+        second = self.paginator.page(after=self.paginator.page().next_cursor)
+        last = self.paginator.page(after=second.next_cursor)
+
+        back = self.paginator.page(before=last.previous_cursor)
+        self.assertEqual(self.ids_on(back), self.ids_on(second))
+        self.assertTrue(back.has_next and back.has_previous)
+        first = self.paginator.page(before=back.previous_cursor)
+        self.assertEqual(self.ids_on(first), self.ids[0:3])
+        self.assertFalse(first.has_previous)
+
+    def test_invalid_cursor_serves_first_page(self):
+        for cursor in ('not-a-cursor', 'WzFd', 'WyJ4IiwieSJd'):
+            page = self.paginator.page(after=cursor)
+            self.assertEqual(self.ids_on(page), self.ids[0:3])
+            self.assertFalse(page.has_previous)
+
+
+@override_settings(GALLERY_PAGE_SIZE=2)
+class GalleryCursorTests(TestCase):
+    def setUp(self):
+        GalleryImage.objects.bulk_create([
+            GalleryImage(title=f'Photo {n}', image=f'gallery/photo{n}.jpg') for n in range(5)
+        ])
+        # Photos uploaded together share a timestamp
+        GalleryImage.objects.update(uploaded_at=timezone.now())
+        self.titles = [f'Photo {n}' for n in reversed(range(5))]
+
+    def fetch(self, cursor=None):
+        response = self.client.get('/api/gallery/', {'cursor': cursor} if cursor is not None else {})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [title for title in self.titles if f'alt="{title}"' in data['html']], data['next']
+
+    def test_api_pages_through_every_photo_once(self):
+        seen, cursor = self.fetch()
+        pages = [seen]
+        while cursor:
+            titles, cursor = self.fetch(cursor)
+            pages.append(titles)
+        self.assertEqual(pages, [self.titles[0:2], self.titles[2:4], self.titles[4:]])
+
+    def test_malformed_cursor_serves_first_page(self):
+        first = self.fetch()
+        for cursor in ('', 'not-a-cursor', 'WzFd', 'WyJ4IiwieSJd'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.fetch(cursor), first)
+
+    def test_gallery_renders_first_page_with_next_cursor(self):
+        response = self.client.get('/gallery/')
+        photos = response.context['photos']
+        self.assertEqual([photo.title for photo in photos], self.titles[0:2])
+        self.assertEqual(response.context['next_cursor'], photos.next_cursor)
+        self.assertContains(response, f'data-next="{photos.next_cursor}"')
+
+
+class SQLiteTests(TransactionTestCase):
+    def pragma(self, cursor, name):
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_new_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            database = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')})
+            try:
+                with database.cursor() as cursor:
+                    self.assertEqual(self.pragma(cursor, 'journal_mode'), 'wal')
+                    self.assertEqual(self.pragma(cursor, 'busy_timeout'), settings.SQLITE_PRAGMAS['busy_timeout'])
+                    self.assertEqual(self.pragma(cursor, 'synchronous'), 1)  # NORMAL
+                    self.assertEqual(self.pragma(cursor, 'cache_size'), settings.SQLITE_PRAGMAS['cache_size'])
+            finally:
+                database.close()
+
+    def test_write_transaction_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with write_transaction():
+                Service.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_other_transactions_stay_deferred(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Service.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN')
+
+    def test_nested_write_transaction_is_a_savepoint(self):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                with write_transaction():
+                    Service.objects.exists()
+        self.assertTrue(queries[0]['sql'].startswith('SAVEPOINT'))
+
+
+class DeployCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+
+    def test_several_workers_need_shared_cache(self):
+        with override_settings(WEB_CONCURRENCY=2, CACHES=self.LOCMEM):
+            self.assertEqual([error.id for error in checks.check_shared_cache(None)], ['main.E001'])
+        with override_settings(WEB_CONCURRENCY=2, CACHES=self.REDIS):
+            self.assertEqual(checks.check_shared_cache(None), [])
+        with override_settings(WEB_CONCURRENCY=1, CACHES=self.LOCMEM):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Tests that migrate to an older state, restoring the latest one afterwards."""
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class ServiceForeignKeyMigrationTests(MigrationTestCase):
+    before = [('main', '0007_consultation_search')]
+    after = [('main', '0015_service_listed')]
+
+    def test_booked_names_become_services(self):
+        apps = self.migrate(self.before)
+        OldService = apps.get_model('main', 'Service')
+        OldConsultation = apps.get_model('main', 'Consultation')
+        OldService.objects.create(title='Solar Roofing', description='Panels and batteries')
+        booked = {
+            'Ada': '  interior DESIGN   consultation ',
+            'Grace': 'Solar Roofing',
+            'Alan': 'Kitchen refit',
+            'Edsger': 'Kitchen refit',
+        }
+        for name, service in booked.items():
+            OldConsultation.objects.create(
+                name=name, email=f'{name.lower()}@example.com', phone='0712345678',
+                service=service, appointment_date=date(2030, 1, 15),
+            )
+
+        apps = self.migrate(self.after)
+        Service = apps.get_model('main', 'Service')
+        Consultation = apps.get_model('main', 'Consultation')
+        titles = dict(Consultation.objects.values_list('name', 'service__title'))
+
+        self.assertEqual(titles, {
+            'Ada': 'Interior design consultation',
+            'Grace': 'Solar Roofing',
+            'Alan': 'Kitchen refit',
+            'Edsger': 'Kitchen refit',
+        })
+        self.assertEqual(Service.objects.filter(title='Kitchen refit').count(), 1)
+        # Seeded defaults and real services stay public; ones made from
+        # booking strings are unlisted
+        self.assertEqual(
+            set(Service.objects.filter(listed=False).values_list('title', flat=True)), {'Kitchen refit'},
+        )
+        self.assertTrue(Service.objects.get(title='Green spaces and indoor plants').listed)
+
+
+class ExcerptBackfillMigrationTests(MigrationTestCase):
+    before = [('main', '0010_gallery_uploaded_index')]
+    after = [('main', '0011_blogpost_excerpt')]
+
+    def test_existing_posts_get_excerpts(self):
+        apps = self.migrate(self.before)
+        OldBlogPost = apps.get_model('main', 'BlogPost')
+        long = ' '.join(f'word{n}' for n in range(30))
+        OldBlogPost.objects.create(title='Long', content=long)
+        OldBlogPost.objects.create(title='Short', content='Bamboo grows back.')
+        OldBlogPost.objects.create(title='Empty', content='')
+
+        apps = self.migrate(self.after)
+        excerpts = dict(apps.get_model('main', 'BlogPost').objects.values_list('title', 'excerpt'))
+
+        self.assertEqual(excerpts, {
+            'Long': ' '.join(f'word{n}' for n in range(20)) + ' …',
+            'Short': 'Bamboo grows back.',
+            'Empty': '',
+        })
+        self.assertEqual(excerpts['Long'], make_excerpt(long))
+
+
+class ExcerptTests(TestCase):
+    def test_save_keeps_excerpt_in_step_with_content(self):
+        post = BlogPost.objects.create(title='Bamboo floors', content='Bamboo grows back.')
+        self.assertEqual(post.excerpt, 'Bamboo grows back.')
+
+        post.content = ' '.join(['cork'] * 25)
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, ' '.join(['cork'] * 20) + ' …')
+
+    def test_blog_list_shows_stored_excerpt(self):
+        BlogPost.objects.create(title='Bamboo floors', content=' '.join(['bamboo'] * 25))
+        response = self.client.get('/blog/')
+        self.assertContains(response, ' '.join(['bamboo'] * 20) + ' …')
+        self.assertNotContains(response, ' '.join(['bamboo'] * 21))
+
+
+class LookupServiceTests(TestCase):
+    def setUp(self):
+        self.listed = Service.objects.create(title='Garden Design', description='Planting plans')
+        self.unlisted = Service.objects.create(title='Kitchen refit', description='', listed=False)
+
+    def test_by_primary_key(self):
+        self.assertEqual(lookup_service(str(self.listed.pk)), self.listed)
+        self.assertEqual(lookup_service(f' {self.unlisted.pk} '), self.unlisted)
+        self.assertIsNone(lookup_service(str(self.unlisted.pk + 100)))
+
+    def test_by_title(self):
+        Service.objects.create(title='Garden Design', description='Duplicate')
+        self.assertEqual(lookup_service('Garden Design'), self.listed)
+        self.assertIsNone(lookup_service('garden design'))
+
+    def test_listed_only(self):
+        self.assertEqual(lookup_service(str(self.listed.pk), listed_only=True), self.listed)
+        self.assertIsNone(lookup_service(str(self.unlisted.pk), listed_only=True))
+        self.assertIsNone(lookup_service('Kitchen refit', listed_only=True))
+
+    def test_blank(self):
+        self.assertIsNone(lookup_service(''))
+        self.assertIsNone(lookup_service(None))
+        self.assertIsNone(lookup_service('   '))
+
+
+class ServiceCatalogueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def catalogue(self):
+        with self.assertNumQueries(0):
+            return catalogue.get_service_catalogue()
+
+    def titles(self):
+        return [service['title'] for service in self.catalogue()]
+
+    def change(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return action()
+
+    def test_built_once_then_served_from_cache(self):
+        with self.assertNumQueries(1):
+            built = catalogue.get_service_catalogue()
+        self.assertEqual(self.catalogue(), built)
+
+    def test_saving_and_deleting_a_service_invalidate_the_catalogue(self):
+        catalogue.get_service_catalogue()
+        service = self.change(lambda: Service.objects.create(title='Garden Design', description='Planting plans'))
+        catalogue.get_service_catalogue()
+        self.assertEqual(self.titles()[-1], 'Garden Design')
+
+        service.title = 'Garden Planning'
+        self.change(service.save)
+        catalogue.get_service_catalogue()
+        self.assertEqual(self.titles()[-1], 'Garden Planning')
+
+        self.change(service.delete)
+        catalogue.get_service_catalogue()
+        self.assertNotIn('Garden Planning', self.titles())
+
+    def test_rolled_back_change_keeps_the_cached_catalogue(self):
+        catalogue.get_service_catalogue()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Service.objects.create(title='Garden Design', description='Planting plans')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertNotIn('Garden Design', self.titles())
+
+    def test_listed_catalogue_leaves_out_unlisted_services(self):
+        listed = Service.objects.create(title='Garden Design', description='Planting plans')
+        unlisted = Service.objects.create(title='Legacy Service', description='', listed=False)
+        ids = [service['id'] for service in catalogue.get_listed_catalogue()]
+        self.assertIn(listed.pk, ids)
+        self.assertNotIn(unlisted.pk, ids)
+        self.assertIn(unlisted.pk, [service['id'] for service in self.catalogue()])
+
+    def test_invalidate_moves_to_a_new_version(self):
+        catalogue.get_service_catalogue()
+        version = cache.get(catalogue.VERSION_KEY)
+        catalogue.invalidate()
+        self.assertEqual(cache.get(catalogue.VERSION_KEY), version + 1)
+        cache.delete(catalogue.VERSION_KEY)
+        catalogue.invalidate()
+        self.assertEqual(cache.get(catalogue.VERSION_KEY), 1)
+
+    def test_unreadable_database_gives_an_uncached_empty_catalogue(self):
+        Service.objects.create(title='Garden Design', description='Planting plans')
+        with mock.patch.object(catalogue, 'build_service_catalogue', side_effect=DatabaseError('no such table')), \
+                self.assertLogs('main.catalogue', 'ERROR'):
+            self.assertEqual(catalogue.get_service_catalogue(), [])
+        with self.assertNumQueries(1):
+            self.assertNotEqual(catalogue.get_service_catalogue(), [])
+
+
+class ChatIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            CHAT_INDEX_SNAPSHOT=os.path.join(directory.name, 'chat-index.pickle'), CHAT_INDEX_CHECK_INTERVAL=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        retrieval.reset()
+        self.addCleanup(retrieval.reset)
+        self.service = Service.objects.create(title='Garden Design', description='Planting plans with native shrubs.')
+        self.post = BlogPost.objects.create(title='Bamboo floors', content='Bamboo grows back within five years.')
+
+    def titles(self, query):
+        return [hit.title for hit in retrieval.search(query)]
+
+    def save(self, instance):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_saved_edit_is_searchable(self):
+        before = retrieval.get_index()
+        self.post.content = 'Cork tiles are warm underfoot.'
+        self.save(self.post)
+
+        self.assertEqual(self.titles('cork'), ['Bamboo floors'])
+        self.assertEqual(self.titles('bamboo grows'), ['Bamboo floors'])  # title still indexed
+        self.assertEqual(self.titles('years'), [])
+        # The index searched before the edit was replaced, not modified
+        self.assertEqual([hit.title for hit in before.search('years')], ['Bamboo floors'])
+        self.assertEqual(before.search('cork'), [])
+
+    def test_deleted_post_is_dropped(self):
+        retrieval.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+
+        self.assertEqual(self.titles('bamboo'), [])
+
+    def test_unlisted_service_is_dropped(self):
+        retrieval.get_index()
+        self.service.listed = False
+        self.save(self.service)
+
+        self.assertEqual(self.titles('shrubs'), [])
+
+    def test_edit_from_another_process_is_not_skipped(self):
+        retrieval.get_index()
+        # Another process edits the service and bumps the shared version
+        Service.objects.filter(pk=self.service.pk).update(description='Rain gardens and ponds.')
+        cache.incr(retrieval.VERSION_KEY)
+        # This process's own edit must not claim the version after that one
+        self.post.content = 'Cork tiles are warm underfoot.'
+        self.save(self.post)
+
+        self.assertEqual(self.titles('ponds'), ['Garden Design'])
+        self.assertEqual(self.titles('cork'), ['Bamboo floors'])
+
+    def test_cold_start_loads_snapshot(self):
+        retrieval.save_snapshot(retrieval.build_index())
+        retrieval.reset()
+
+        with mock.patch.object(retrieval, 'build_index') as build_index:
+            self.assertEqual(self.titles('shrubs'), ['Garden Design'])
+        build_index.assert_not_called()
+
+    def test_snapshot_is_stale_after_content_edit(self):
+        retrieval.save_snapshot(retrieval.build_index())
+        self.assertIsNotNone(retrieval.load_snapshot())
+
+        # No on-commit callbacks run here, so the snapshot file is left in place
+        self.post.content = 'Cork tiles are warm underfoot.'
+        self.post.save()
+        self.assertIsNone(retrieval.load_snapshot())
+
+        retrieval.save_snapshot(retrieval.build_index())
+        self.service.description = 'Rain gardens and ponds.'
+        self.service.save()
+        self.assertIsNone(retrieval.load_snapshot())
+
+
+def jpeg(width, height, name='porch.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'olive').save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+class InlineExecutor:
+    """Runs background image jobs straight away."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class ImageVariantTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = directory.name
+        settings_override = override_settings(MEDIA_ROOT=self.media, IMAGE_VARIANT_WIDTHS=[320, 640])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        executor = mock.patch.object(images, '_get_executor', return_value=InlineExecutor())
+        executor.start()
+        self.addCleanup(executor.stop)
+
+    def files(self, folder):
+        return sorted(os.listdir(os.path.join(self.media, folder)))
+
+    def test_generate_variants(self):
+        storage = FileSystemStorage(location=self.media)
+        name = storage.save('gallery/porch.jpg', jpeg(1000, 500))
+
+        record = images.generate_variants(storage, name)
+
+        self.assertEqual(record, {'source': name, 'width': 1000, 'height': 500, 'sizes': [[320, 160], [640, 320]]})
+        self.assertEqual(self.files('gallery'), [
+            'porch.jpg', 'porch.w320.jpg', 'porch.w320.webp', 'porch.w640.jpg', 'porch.w640.webp',
+        ])
+        with Image.open(storage.path('gallery/porch.w640.webp')) as variant:
+            self.assertEqual((variant.format, variant.size), ('WEBP', (640, 320)))
+
+    def test_small_image_keeps_its_width(self):
+        storage = FileSystemStorage(location=self.media)
+        name = storage.save('gallery/tile.jpg', jpeg(200, 100))
+
+        self.assertEqual(images.generate_variants(storage, name)['sizes'], [[200, 100]])
+
+    def test_saved_image_gets_variants_and_retires_pages(self):
+        version = pages.version(Service)
+        service = Service.objects.create(title='Garden Design', description='Planting plans', image=jpeg(1000, 500))
+
+        service.refresh_from_db()
+        self.assertEqual(service.image_variants['source'], service.image.name)
+        self.assertGreater(pages.version(Service), version)
+
+    def test_blog_post_page_is_retired_when_variants_are_recorded(self):
+        post = BlogPost.objects.create(title='Bamboo floors', content='Bamboo grows back.')
+        pages.cache_blog_post(post, '<p>cached</p>')
+        post.image = jpeg(1000, 500)
+        post.save()
+
+        self.assertIsNone(cache.get(pages._blog_post_key(post.pk)))
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants['source'], post.image.name)
+
+    def test_replaced_image_variants_are_deleted(self):
+        photo = GalleryImage.objects.create(title='Porch', image=jpeg(1000, 500))
+        photo.refresh_from_db()
+        old = photo.image.name
+
+        photo.image = jpeg(800, 400, name='deck.jpg')
+        photo.save()
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.image_variants['source'], photo.image.name)
+        remaining = self.files('gallery')
+        self.assertIn(os.path.basename(old), remaining)  # the original is the storage's business
+        self.assertFalse([name for name in remaining if name.startswith('porch.w')])
+        self.assertEqual(len([name for name in remaining if name.startswith('deck.w')]), 4)
+
+    def test_removed_image_variants_are_deleted(self):
+        photo = GalleryImage.objects.create(title='Porch', image=jpeg(1000, 500))
+        photo.refresh_from_db()
+
+        photo.image = ''
+        photo.save()
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.image_variants, {})
+        self.assertEqual(self.files('gallery'), ['porch.jpg'])
+
+    def test_deleted_object_variants_are_deleted(self):
+        photo = GalleryImage.objects.create(title='Porch', image=jpeg(1000, 500))
+        photo.refresh_from_db()
+
+        photo.delete()
+
+        self.assertEqual(self.files('gallery'), ['porch.jpg'])
+
+    def test_variants_of_a_replaced_image_are_not_recorded(self):
+        photo = GalleryImage.objects.create(title='Porch')
+        name = default_storage.save('gallery/porch.jpg', jpeg(1000, 500))
+
+        images._run(GalleryImage, photo.pk, name)
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.image_variants, {})
+        self.assertEqual(self.files('gallery'), ['porch.jpg'])
+
+
+class ImageTagTests(SimpleTestCase):
+    def render(self, source, **context):
+        return Template('{% load responsive_images %}' + source).render(Context(context))
+
+    def test_responsive_image_with_variants(self):
+        photo = GalleryImage(title='Porch', image='gallery/porch.jpg', image_variants={
+            'source': 'gallery/porch.jpg', 'width': 1000, 'height': 500, 'sizes': [[320, 160], [640, 320]],
+        })
+
+        html = self.render('{% responsive_image photo sizes="50vw" alt="Porch" %}', photo=photo)
+
+        self.assertHTMLEqual(html, (
+            '<picture>'
+            '<source type="image/webp" srcset="/media/gallery/porch.w320.webp 320w, '
+            '/media/gallery/porch.w640.webp 640w" sizes="50vw">'
+            '<img src="/media/gallery/porch.w640.jpg" srcset="/media/gallery/porch.w320.jpg 320w, '
+            '/media/gallery/porch.w640.jpg 640w" sizes="50vw" width="640" height="320" alt="Porch" '
+            'loading="lazy" decoding="async">'
+            '</picture>'
+        ))
+
+    def test_responsive_image_falls_back_to_original(self):
+        photo = GalleryImage(title='Porch', image='gallery/deck.jpg', image_variants={
+            'source': 'gallery/porch.jpg', 'width': 1000, 'height': 500, 'sizes': [[320, 160]],
+        })
+
+        html = self.render('{% responsive_image photo alt="Deck" %}', photo=photo)
+
+        self.assertHTMLEqual(html, '<img src="/media/gallery/deck.jpg" alt="Deck" loading="lazy" decoding="async">')
+        self.assertEqual(self.render('{% responsive_image photo %}', photo=GalleryImage()), '')
+
+    def test_picture_from_manifest(self):
+        manifest = {'main/images/img1.jpg': {'width': 1200, 'height': 800, 'variants': {
+            'avif': [{'path': 'main/images/optimized/img1.w480.avif', 'width': 480}],
+            'webp': [{'path': 'main/images/optimized/img1.w480.webp', 'width': 480}],
+            'jpg': [{'path': 'main/images/optimized/img1.w480.jpg', 'width': 480}],
+        }}}
+
+        with mock.patch('main.templatetags.responsive_images.load_manifest', return_value=manifest):
+            html = self.render("{% picture 'main/images/img1.jpg' alt='Hero' sizes='100vw' loading='eager' %}")
+
+        self.assertHTMLEqual(html, (
+            '<picture>'
+            '<source type="image/avif" srcset="/static/main/images/optimized/img1.w480.avif 480w" sizes="100vw">'
+            '<source type="image/webp" srcset="/static/main/images/optimized/img1.w480.webp 480w" sizes="100vw">'
+            '<img src="/static/main/images/img1.jpg" srcset="/static/main/images/optimized/img1.w480.jpg 480w, '
+            '/static/main/images/img1.jpg 1200w" sizes="100vw" width="1200" height="800" alt="Hero" '
+            'loading="eager" decoding="async">'
+            '</picture>'
+        ))
+
+    def test_picture_without_manifest_entry(self):
+        with mock.patch('main.templatetags.responsive_images.load_manifest', return_value={}):
+            html = self.render("{% picture 'main/images/img1.jpg' alt='Hero' %}")
+
+        self.assertHTMLEqual(
+            html, '<img src="/static/main/images/img1.jpg" alt="Hero" loading="lazy" decoding="async">',
+        )
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Reads against a second SQLite file standing in for a replica."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Added after the runner has set up the configured databases
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica1'] = {
+            **connections.settings[DEFAULT_DB_ALIAS], 'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        cls.databases = cls.databases | {'replica1'}
+        call_command('migrate', database='replica1', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        del cls.databases
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        settings_override = override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_REPLICA_PIN_SECONDS=10)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # The replica has not caught up with the primary's edit yet
+        self.pk = Service.objects.create(title='Primary copy', description='').pk
+        Service.objects.using('replica1').all().delete()
+        Service.objects.using('replica1').create(pk=self.pk, title='Replica copy', description='')
+        self.factory = RequestFactory()
+
+    def title(self):
+        return Service.objects.get(pk=self.pk).title
+
+    def view(self, request):
+        before = self.title()
+        if request.method == 'POST' or 'write' in request.GET:
+            Service.objects.filter(pk=self.pk).update(description='Edited')
+        return HttpResponse(f'{before}/{self.title()}')
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.title(), 'Replica copy')
+
+    def test_primary_block_and_transactions_read_primary(self):
+        with primary():
+            self.assertEqual(self.title(), 'Primary copy')
+        with transaction.atomic():
+            self.assertEqual(self.title(), 'Primary copy')
+        self.assertEqual(self.title(), 'Replica copy')
+
+    def test_other_apps_stay_on_primary(self):
+        self.assertIsNone(PrimaryReplicaRouter().db_for_read(User))
+
+    def test_get_reads_replica_without_pinning(self):
+        response = ReplicaPinningMiddleware(self.view)(self.factory.get('/'))
+
+        self.assertEqual(response.content, b'Replica copy/Replica copy')
+        self.assertNotIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
+
+    def test_post_reads_primary_and_pins_client(self):
+        middleware = ReplicaPinningMiddleware(self.view)
+        response = middleware(self.factory.post('/'))
+
+        self.assertEqual(response.content, b'Primary copy/Primary copy')
+        cookie = response.cookies[ReplicaPinningMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = self.factory.get('/')
+        request.COOKIES[cookie.key] = cookie.value
+        self.assertEqual(middleware(request).content, b'Primary copy/Primary copy')
+        # The pin is per request: reads outside one go to the replica again
+        self.assertEqual(self.title(), 'Replica copy')
+
+    def test_reads_after_a_write_in_the_request_read_primary(self):
+        response = ReplicaPinningMiddleware(self.view)(self.factory.get('/', {'write': '1'}))
+
+        self.assertEqual(response.content, b'Replica copy/Primary copy')
+        self.assertIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
+
+    def test_without_replicas_everything_reads_primary(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.title(), 'Primary copy')
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaPinningMiddleware(self.view)
+
+
+class ConsultationSearchTests(TestCase):
+    def setUp(self):
+        if not search._sqlite_fts_available(connection):
+            self.skipTest('SQLite without FTS5')
+        garden = Service.objects.create(title='Garden Design', description='')
+        kitchen = Service.objects.create(title='Kitchen refit', description='')
+        for name, email, phone, service in (
+            ('Ada Lovelace', 'ada@example.com', '+91 63017-39482', garden),
+            ('Grace Hopper', 'grace@navy.example', '(020) 7946 0018', kitchen),
+            ('Alan Turing', 'alan@bletchley.example', '07700 900123', kitchen),
+        ):
+            Consultation.objects.create(
+                name=name, email=email, phone=phone, service=service, appointment_date=date(2030, 1, 15),
+            )
+
+    def names(self, query):
+        return sorted(search.search_consultations(Consultation.objects.all(), query).values_list('name', flat=True))
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.names('ada'), ['Ada Lovelace'])
+        self.assertEqual(self.names('LOVE'), ['Ada Lovelace'])
+        self.assertEqual(self.names('lace'), [])
+        self.assertEqual(self.names('grace hop'), ['Grace Hopper'])
+        self.assertEqual(self.names('grace turing'), [])
+
+    def test_email(self):
+        self.assertEqual(self.names('grace@navy'), ['Grace Hopper'])
+        self.assertEqual(self.names('bletchley.example'), ['Alan Turing'])
+
+    def test_phone_digits(self):
+        for query in ('6301739482', '+91 63017 39482', '916301739482', '63017', '(630) 17'):
+            self.assertEqual(self.names(query), ['Ada Lovelace'], query)
+        self.assertEqual(self.names('020 7946'), ['Grace Hopper'])
+        self.assertEqual(self.names('39482'), [])
+
+    def test_service_title(self):
+        self.assertEqual(self.names('kitchen'), ['Alan Turing', 'Grace Hopper'])
+        self.assertEqual(self.names('garden des'), ['Ada Lovelace'])
+
+    def test_fts5_syntax_in_input_is_literal(self):
+        for query in ('"ada', 'ada"', 'ada*', '-ada', 'ada -', '(ada)', 'ada:', '^ada'):
+            self.assertEqual(self.names(query), ['Ada Lovelace'], query)
+        for query in ('OR', 'NOT ada', 'ada NEAR grace', 'name: grace'):
+            self.assertEqual(self.names(query), [], query)
+        # Nothing indexable: no filter at all
+        self.assertEqual(len(self.names('" * -')), 3)
+
+    def test_fts5_query(self):
+        self.assertEqual(search.fts5_query('ada love'), '"ada"* AND "love"*')
+        self.assertEqual(search.fts5_query('say "hi"'), '"say"* AND """hi"""*')
+        self.assertEqual(search.fts5_query('+91 6301'), '("+91"* AND "6301"*) OR phone : "916301"*')
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = Service.objects.create(title='Garden Design', description='Planting plans')
+
+    def book(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Consultation.objects.create(**queued_booking(self.service.pk))
+
+    def cached_stats(self):
+        with self.assertNumQueries(0):
+            return get_dashboard_stats()
+
+    def test_counted_once_then_served_from_cache(self):
+        self.book()
+        with self.assertNumQueries(4):
+            self.assertEqual(get_dashboard_stats()['total_bookings'], 1)
+        self.assertEqual(self.cached_stats(), {
+            'total_bookings': 1, 'total_services': Service.objects.count(), 'total_images': 0, 'total_posts': 0,
+        })
+
+    def test_create_edit_and_delete_adjust_cached_totals(self):
+        get_dashboard_stats()
+        booking = self.book()
+        self.book()
+        self.assertEqual(self.cached_stats()['total_bookings'], 2)
+
+        booking.name = 'Grace Hopper'
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertEqual(self.cached_stats()['total_bookings'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.delete()
+        self.assertEqual(self.cached_stats()['total_bookings'], 1)
+        self.assertEqual(Consultation.objects.count(), 1)
+
+    def test_rolled_back_booking_is_not_counted(self):
+        get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Consultation.objects.create(**queued_booking(self.service.pk))
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.cached_stats()['total_bookings'], 0)
+
+    def test_queued_bookings_are_counted(self):
+        get_dashboard_stats()
+        booking_queue.insert([queued_booking(self.service.pk) for _ in range(3)])
+        self.assertEqual(self.cached_stats()['total_bookings'], 3)
+
+
+class ChatIntentTests(SimpleTestCase):
+    MESSAGES = {
+        'Hello': 'greeting',
+        'What services do you offer?': 'services',
+        'How can I book a consultation?': 'booking',
+        'Booking next Tuesday': 'booking',
+        'designer lighting': 'design',
+        'what is the weather': chat.FALLBACK_INTENT,
+        # Keywords of several intents, ranked by the classifier
+        'What eco-friendly materials do you recommend?': 'eco_materials',
+        'Do you use reclaimed wood for furniture?': 'eco_materials',
+        'How should I arrange furniture in a small room?': 'design',
+        'Can you schedule a meeting?': 'booking',
+    }
+
+    def test_classify_intent(self):
+        for message, intent in self.MESSAGES.items():
+            with self.subTest(message=message):
+                self.assertEqual(chat.classify_intent(message), intent)
+
+    def test_batch_classification_matches_single(self):
+        self.assertEqual(chat.classify_intents(list(self.MESSAGES)), list(self.MESSAGES.values()))
+        self.assertEqual(chat.classify_intents([]), [])
+
+    def test_canned_answer_follows_intent(self):
+        self.assertEqual(chat.generate_ai_response('hello'), chat.RESPONSES['greeting'])
+        self.assertEqual(chat.generate_ai_response('what is the weather'), chat.RESPONSES[chat.FALLBACK_INTENT])
+
+    def test_classifier_picks_only_among_candidates(self):
+        classifier = HashedNgramClassifier(dimensions=512).fit({
+            'fruit': ['apple', 'banana', 'ripe pear'],
+            'vehicle': ['car', 'truck', 'bicycle'],
+        })
+        self.assertEqual(classifier.predict(['a ripe banana', 'a red truck']), ['fruit', 'vehicle'])
+        self.assertEqual(classifier.classify('a ripe banana', {'vehicle'}), 'vehicle')
+        self.assertEqual(classifier.scores(['apple']).shape, (1, 2))
+
+
+class IntentMatcherTests(SimpleTestCase):
+    def test_greetings_match_whole_words_only(self):
+        for message in ('hi', 'hello', 'hi there', 'well, hello!'):
+            with self.subTest(message=message):
+                self.assertEqual(chat.matched_intents(message), {'greeting'})
+        for message in ('this', 'they', 'hiring'):
+            with self.subTest(message=message):
+                self.assertEqual(chat.matched_intents(message), set())
+
+    def test_trie_pattern_matches_exactly_its_words(self):
+        pattern = re.compile(rf'^(?:{chat._trie_pattern(["hi", "hey", "hello", "good morning"])})$')
+        for word in ('hi', 'hey', 'hello', 'good morning', 'good  morning'):
+            with self.subTest(word=word):
+                self.assertTrue(pattern.match(word))
+        for word in ('h', 'he', 'hell', 'good', 'this'):
+            with self.subTest(word=word):
+                self.assertIsNone(pattern.match(word))
+
+
+class BlogDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.post = BlogPost.objects.create(title='Bamboo floors', content='Bamboo grows back within five years.')
+        self.url = f'/blog/{self.post.pk}/'
+
+    def test_missing_post_is_404(self):
+        self.assertEqual(self.client.get(f'/blog/{self.post.pk + 1}/').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_conditional_headers(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Bamboo grows back within five years.')
+        self.assertTrue(response['ETag'].startswith(f'"blog-{self.post.pk}-'))
+        self.assertEqual(response['Last-Modified'], http_date(self.post.updated_at.timestamp()))
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+    def test_current_etag_gets_304_from_the_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).content, first.content)
+
+    def test_edit_changes_etag_and_page(self):
+        first = self.client.get(self.url)
+        self.post.content = 'Cork is harvested from living trees.'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+
+        response = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertContains(response, 'Cork is harvested from living trees.')
@@ -1,19 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Public read paths use the async variants when served over ASGI
+if settings.ASYNC_VIEWS:
+    from . import async_views as public_views
+else:
+    public_views = views
+
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('about/', views.about, name='about'),
-    path('services/', views.services, name='services'),
-    path('contact/', views.contact, name='contact'),
+    path('', public_views.home, name='home'),
+    path('about/', public_views.about, name='about'),
+    path('services/', public_views.services, name='services'),
+    path('contact/', public_views.contact, name='contact'),
+    path('gallery/', views.gallery, name='gallery'),
+    path('blog/', views.blog_list, name='blog_list'),
+    path('blog/<int:id>/', views.blog_detail, name='blog_detail'),
     path('create-admin/', views.create_admin),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('dashboard/consultation/create/', views.create_consultation, name='create_consultation'),
     path('dashboard/consultation/<int:id>/edit/', views.edit_consultation, name='edit_consultation'),
     path('dashboard/consultation/<int:id>/delete/', views.delete_consultation, name='delete_consultation'),
-    path('api/chat/', views.chat_ai, name='chat_ai'),
+    path('api/chat/', public_views.chat_ai, name='chat_ai'),
+    path('api/gallery/', views.gallery_api, name='gallery_api'),
 ]
-
-
-
-
@@ -1,117 +1,56 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponseNotFound
+from django.template.loader import render_to_string
+from django.http import JsonResponse, HttpResponse, HttpResponseNotFound, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from .models import Consultation, Service, GalleryImage, BlogPost
-from django.db.models import Q
+from . import booking_queue, pages, readiness
+from .pagination import KeysetPage, KeysetPaginator, capped_count, cursor_querystring
+from .search import search_consultations
+from .sqlite import write_transaction
+from .stats import get_dashboard_stats
+from .catalogue import get_listed_catalogue, get_service_catalogue, lookup_service
+from .chat import encoded_response, encoded_stream, normalize_message
+from .idempotency import idempotent
+from .ratelimit import rate_limit
+from .routers import primary
+from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-def ensure_migrations_run():
-    """Helper function to ensure database tables exist by running migrations if needed"""
-    try:
-        # Test if tables exist
-        Consultation.objects.exists()
-        return True
-    except Exception as e:
-        error_str = str(e).lower()
-        if "no such table" in error_str or "does not exist" in error_str or "relation" in error_str:
-            logger.info("Tables not found. Running migrations automatically...")
-            try:
-                from django.core.management import call_command
-                from django.db import connections
-                import sys
-                from io import StringIO
-                
-                # Close all database connections
-                try:
-                    for conn in connections.all():
-                        conn.close()
-                except:
-                    pass
-                
-                # Capture stdout to see migration output
-                old_stdout = sys.stdout
-                sys.stdout = StringIO()
-                
-                try:
-                    # Run migrations for main app specifically
-                    call_command('migrate', 'main', verbosity=2, interactive=False)
-                    output = sys.stdout.getvalue()
-                    logger.info(f"Migration output: {output}")
-                except Exception as migrate_cmd_error:
-                    logger.error(f"Migration command error: {str(migrate_cmd_error)}")
-                    # Try running all migrations
-                    try:
-                        sys.stdout = StringIO()
-                        call_command('migrate', verbosity=2, interactive=False)
-                        output = sys.stdout.getvalue()
-                        logger.info(f"Migration output (all apps): {output}")
-                    except Exception as retry_error:
-                        logger.error(f"Migration retry failed: {str(retry_error)}")
-                        import traceback
-                        logger.error(traceback.format_exc())
-                        sys.stdout = old_stdout
-                        return False
-                finally:
-                    sys.stdout = old_stdout
-                
-                # Close all connections again
-                try:
-                    for conn in connections.all():
-                        conn.close()
-                except:
-                    pass
-                
-                # Wait a moment for database to be ready
-                import time
-                time.sleep(0.5)
-                
-                # Verify tables exist now by forcing a new connection
-                try:
-                    from django.db import connection
-                    connection.ensure_connection()
-                    test_result = Consultation.objects.exists()
-                    logger.info(f"Tables verified after migration: {test_result}")
-                    return True
-                except Exception as verify_error:
-                    logger.error(f"Tables still don't exist after migration: {str(verify_error)}")
-                    import traceback
-                    logger.error(traceback.format_exc())
-                    # Still return True - let the actual operation try
-                    return True
-                    
-            except Exception as migrate_error:
-                logger.error(f"Auto-migration failed: {str(migrate_error)}")
-                import traceback
-                logger.error(traceback.format_exc())
-                return False
-        else:
-            # Different error, not a missing table
-            logger.error(f"Database error (not missing table): {str(e)}")
-            return False
-
+@pages.cached_page()
 def home(request):
     return render(request, 'main/index.html')
 
+@pages.cached_page()
 def about(request):
     return render(request, 'main/about.html')
 
+@pages.cached_page(Service)
 def services(request):
-    all_services = Service.objects.all()
-    return render(request, 'main/services.html', {"services": all_services})
+    # Only evaluated when the cached service cards fragment has expired
+    all_services = Service.objects.public()
+    return render(request, 'main/services.html', {
+        "services": all_services,
+        "services_version": pages.fragment_version(Service),
+        "cache_timeout": settings.PAGE_CACHE_TIMEOUT,
+    })
 
+# Retries are replayed before the rate limiter, and rejected requests never
+# claim a key, so a retry never gets a 429 and a flood never writes
+@idempotent('contact', limit=rate_limit('contact', rate='10/h', burst=5, methods=('POST',)))
 def contact(request):
     if request.method == "POST":
         # Check if it's an AJAX request
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
         
-        # Ensure migrations are run before creating consultation
-        migration_success = ensure_migrations_run()
-        if not migration_success:
+        # Refuse bookings until the schema readiness latch is open
+        if not readiness.is_schema_ready():
             error_msg = "Database setup is in progress. Please try again in a moment."
             if is_ajax:
                 return JsonResponse({
@@ -120,8 +59,10 @@ def contact(request):
                 }, status=503)  # Service Unavailable
             else:
                 messages.error(request, error_msg)
+                # Schema is not ready, so there are no services to offer yet
                 return render(request, 'main/contact.html', {
-                    'success': None
+                    'success': None,
+                    'services': [],
                 })
         
         try:
@@ -141,6 +82,9 @@ def contact(request):
                 raise ValidationError("Phone is required")
             if not service:
                 raise ValidationError("Service is required")
+            service = lookup_service(service, listed_only=True)
+            if service is None:
+                raise ValidationError("Please select a valid service")
             if not appointment_date:
                 raise ValidationError("Appointment date is required")
             
@@ -159,24 +103,33 @@ def contact(request):
             except ValueError as ve:
                 raise ValidationError(f"Invalid date format: {str(ve)}. Please use YYYY-MM-DD format.")
             
-            # Create consultation
-            consultation = Consultation.objects.create(
-                name=name,
-                email=email,
-                phone=phone,
-                service=service,
-                appointment_date=parsed_date,
-            )
+            booking = {
+                "name": name,
+                "email": email,
+                "phone": phone,
+                "service_id": service.pk,
+                "appointment_date": parsed_date,
+                "reference": booking_queue.new_reference(),
+            }
+            if settings.BOOKING_QUEUE:
+                # Journalled now, inserted by the background flusher
+                booking_queue.enqueue(booking)
+            else:
+                # Create consultation, queueing for the SQLite write lock
+                with write_transaction():
+                    Consultation.objects.create(**booking)
+            success_msg = f"Your consultation has been booked successfully! Your booking reference is {booking['reference']}."
             
             # Return JSON response for AJAX requests
             if is_ajax:
                 return JsonResponse({
                     "success": True,
-                    "message": "Your consultation has been booked successfully!"
+                    "message": success_msg,
+                    "reference": booking["reference"],
                 })
             else:
                 # Fallback for non-AJAX requests
-                messages.success(request, 'Your consultation has been booked successfully!')
+                messages.success(request, success_msg)
                 return redirect('/contact/?success=1')
                 
         except ValidationError as e:
@@ -211,59 +164,72 @@ def contact(request):
                 messages.error(request, error_message)
     
     return render(request, 'main/contact.html', {
-        'success': request.GET.get('success')
+        'success': request.GET.get('success'),
+        'services': get_listed_catalogue(),
     })
 
 
+def gallery_page(request):
+    """One keyset page of photos, newest first, after ``?cursor=``"""
+    photos = GalleryImage.objects.only('title', 'image', 'image_variants', 'uploaded_at')
+    paginator = KeysetPaginator(photos, ('-uploaded_at', '-id'), settings.GALLERY_PAGE_SIZE)
+    return paginator.page(after=request.GET.get('cursor'))
+
 def gallery(request):
-    photos = GalleryImage.objects.all()
-    return render(request, 'main/gallery.html', {"photos": photos})
+    """Gallery with the first page server-rendered; the rest load on scroll"""
+    photos = gallery_page(request)
+    return render(request, 'main/gallery.html', {
+        "photos": photos,
+        "next_cursor": photos.next_cursor or "",
+    })
+
+def gallery_api(request):
+    """Next page of gallery cards as rendered HTML plus the cursor after it"""
+    photos = gallery_page(request)
+    return JsonResponse({
+        "html": render_to_string('main/partials/gallery_cards.html', {"photos": photos}, request),
+        "next": photos.next_cursor,
+    })
 
 def blog_list(request):
-    posts = BlogPost.objects.all().order_by('-created_at')
-    return render(request, 'main/blog_list.html', {'posts': posts})
+    """Newest posts first, one keyset page at a time, without loading post bodies"""
+    posts = BlogPost.objects.defer('content', 'author')
+    paginator = KeysetPaginator(posts, ('-created_at', '-id'), settings.BLOG_PAGE_SIZE)
+    page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+    return render(request, 'main/blog_list.html', {
+        'posts': page,
+        'next_page_query': cursor_querystring(request.GET, after=page.next_cursor) if page.has_next else "",
+        'previous_page_query': cursor_querystring(request.GET, before=page.previous_cursor) if page.has_previous else "",
+    })
 
+@cache_control(max_age=0, must_revalidate=True)
+@condition(etag_func=pages.blog_post_etag, last_modified_func=pages.blog_post_last_modified)
 def blog_detail(request, id):
-    post = BlogPost.objects.get(id=id)
-    return render(request, 'main/blog_detail.html', {'post': post})
+    """One post, from the page cache unless it changed since it was rendered"""
+    _, html = pages.cached_blog_post(request, id)
+    if html is None:
+        with primary():
+            post = get_object_or_404(BlogPost, id=id)
+        html = render_to_string('main/blog_detail.html', {'post': post}, request)
+        pages.cache_blog_post(post, html)
+    return HttpResponse(html)
+
+def dashboard_page_size(request):
+    """Page size from ?per_page=, clamped to the configured maximum"""
+    try:
+        per_page = int(request.GET.get('per_page', settings.DASHBOARD_PAGE_SIZE))
+    except ValueError:
+        per_page = settings.DASHBOARD_PAGE_SIZE
+    return max(1, min(per_page, settings.DASHBOARD_MAX_PAGE_SIZE))
 
 def dashboard(request):
     try:
-        # Auto-run migrations if tables don't exist
-        migration_success = ensure_migrations_run()
-        if not migration_success:
-            messages.warning(request, "Database tables are not set up. Attempting to create them...")
-            # Try one more time
-            migration_success = ensure_migrations_run()
-            if migration_success:
-                messages.success(request, "Database tables created automatically! Please refresh the page.")
-            else:
-                messages.error(request, "Could not create database tables. Please contact administrator.")
-        
-        # Safely get counts with error handling
-        try:
-            total_bookings = Consultation.objects.count()
-        except Exception as e:
-            logger.error(f"Error counting consultations: {str(e)}")
-            total_bookings = 0
-        
-        try:
-            total_services = Service.objects.count()
-        except Exception as e:
-            logger.error(f"Error counting services: {str(e)}")
-            total_services = 0
-        
-        try:
-            total_images = GalleryImage.objects.count()
-        except Exception as e:
-            logger.error(f"Error counting gallery images: {str(e)}")
-            total_images = 0
+        if not readiness.is_schema_ready():
+            messages.warning(request, "Database setup is in progress. Please refresh the page in a moment.")
         
-        try:
-            total_posts = BlogPost.objects.count()
-        except Exception as e:
-            logger.error(f"Error counting blog posts: {str(e)}")
-            total_posts = 0
+        # Totals come from the signal-maintained cache
+        stats = get_dashboard_stats()
+        total_bookings = stats['total_bookings']
 
         # Get search query
         search_query = request.GET.get('search', '').strip()
@@ -273,56 +239,63 @@ def dashboard(request):
         filter_date_from = request.GET.get('date_from', '').strip()
         filter_date_to = request.GET.get('date_to', '').strip()
 
-        # Get all bookings with filters
-        all_bookings_list = []
+        # Get one page of bookings with filters
+        bookings_page = KeysetPage([], None, None)
+        bookings_count, bookings_count_truncated = 0, False
         try:
-            all_bookings = Consultation.objects.all()
+            all_bookings = Consultation.objects.select_related('service')
+            filtered = False
             
             # Apply search filter
             if search_query:
-                all_bookings = all_bookings.filter(
-                    Q(name__icontains=search_query) |
-                    Q(email__icontains=search_query) |
-                    Q(phone__icontains=search_query) |
-                    Q(service__icontains=search_query)
-                )
+                all_bookings = search_consultations(all_bookings, search_query)
+                filtered = True
             
             # Apply service filter
             if filter_service:
-                all_bookings = all_bookings.filter(service=filter_service)
+                if filter_service.isdigit():
+                    all_bookings = all_bookings.filter(service_id=int(filter_service))
+                else:
+                    all_bookings = all_bookings.filter(service__title=filter_service)
+                filtered = True
             
             # Apply date filters
             if filter_date_from:
                 all_bookings = all_bookings.filter(appointment_date__gte=filter_date_from)
+                filtered = True
             if filter_date_to:
                 all_bookings = all_bookings.filter(appointment_date__lte=filter_date_to)
+                filtered = True
             
-            # Order by submitted date (newest first)
-            all_bookings = all_bookings.order_by('-submitted_at')
-            all_bookings_list = list(all_bookings)
+            # Newest first, paginated by (submitted_at, id) cursor
+            paginator = KeysetPaginator(all_bookings, ('-submitted_at', '-id'), dashboard_page_size(request))
+            bookings_page = paginator.page(
+                after=request.GET.get('after'),
+                before=request.GET.get('before'),
+            )
+            
+            # Unfiltered totals are already known; filtered ones are counted up to a cap
+            if filtered:
+                bookings_count, bookings_count_truncated = capped_count(
+                    all_bookings, settings.DASHBOARD_COUNT_CAP
+                )
+            else:
+                bookings_count = total_bookings
             
         except Exception as e:
             logger.error(f"Error fetching consultations: {str(e)}")
-            all_bookings_list = []
+            bookings_page = KeysetPage([], None, None)
 
-        # Get unique services for filter dropdown
-        try:
-            unique_services = Consultation.objects.values_list('service', flat=True).distinct().order_by('service')
-        except:
-            unique_services = [
-                'Interior design consultation',
-                'Custom eco-friendly furniture',
-                'Renovation with sustainable materials',
-                'Green spaces and indoor plants'
-            ]
+        # Services for the filter dropdown
+        unique_services = get_service_catalogue()
 
         context = {
-            "total_bookings": total_bookings,
-            "total_services": total_services,
-            "total_images": total_images,
-            "total_posts": total_posts,
-            "recent_bookings": all_bookings_list,
-            "all_bookings": all_bookings_list,
+            **stats,
+            "all_bookings": bookings_page,
+            "bookings_count": bookings_count,
+            "bookings_count_truncated": bookings_count_truncated,
+            "next_page_query": cursor_querystring(request.GET, after=bookings_page.next_cursor) if bookings_page.has_next else "",
+            "previous_page_query": cursor_querystring(request.GET, before=bookings_page.previous_cursor) if bookings_page.has_previous else "",
             "search_query": search_query,
             "filter_service": filter_service,
             "filter_date_from": filter_date_from,
@@ -342,8 +315,8 @@ def dashboard(request):
             "total_services": 0,
             "total_images": 0,
             "total_posts": 0,
-            "recent_bookings": [],
             "all_bookings": [],
+            "bookings_count": 0,
             "search_query": "",
             "filter_service": "",
             "filter_date_from": "",
@@ -352,14 +325,14 @@ def dashboard(request):
         }
         return render(request, 'main/dashboard.html', context)
 
+@idempotent('create_consultation')
 def create_consultation(request):
     """Create a new consultation"""
     if request.method == "POST":
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
         
-        # Ensure migrations are run before creating consultation
-        migration_success = ensure_migrations_run()
-        if not migration_success:
+        # Refuse bookings until the schema readiness latch is open
+        if not readiness.is_schema_ready():
             error_msg = "Database setup is in progress. Please try again in a moment."
             if is_ajax:
                 return JsonResponse({
@@ -368,18 +341,9 @@ def create_consultation(request):
                 }, status=503)  # Service Unavailable
             else:
                 messages.error(request, error_msg)
-                # Get unique services for dropdown even on error
-                try:
-                    unique_services = Consultation.objects.values_list('service', flat=True).distinct().order_by('service')
-                except:
-                    unique_services = [
-                        'Interior design consultation',
-                        'Custom eco-friendly furniture',
-                        'Renovation with sustainable materials',
-                        'Green spaces and indoor plants'
-                    ]
+                # Schema is not ready, so there are no services to offer yet
                 return render(request, 'main/create_consultation.html', {
-                    'unique_services': unique_services
+                    'unique_services': []
                 })
         
         try:
@@ -397,6 +361,9 @@ def create_consultation(request):
                 raise ValidationError("Phone is required")
             if not service:
                 raise ValidationError("Service is required")
+            service = lookup_service(service)
+            if service is None:
+                raise ValidationError("Please select a valid service")
             if not appointment_date:
                 raise ValidationError("Appointment date is required")
             
@@ -415,14 +382,15 @@ def create_consultation(request):
             except ValueError as ve:
                 raise ValidationError(f"Invalid date format: {str(ve)}. Please use YYYY-MM-DD format.")
             
-            # Create consultation
-            consultation = Consultation.objects.create(
-                name=name,
-                email=email,
-                phone=phone,
-                service=service,
-                appointment_date=parsed_date,
-            )
+            # Create consultation, queueing for the SQLite write lock
+            with write_transaction():
+                consultation = Consultation.objects.create(
+                    name=name,
+                    email=email,
+                    phone=phone,
+                    service=service,
+                    appointment_date=parsed_date,
+                )
             
             if is_ajax:
                 return JsonResponse({
@@ -463,32 +431,8 @@ def create_consultation(request):
             else:
                 messages.error(request, error_message)
     
-    # Ensure migrations are run before getting unique services
-    try:
-        ensure_migrations_run()
-    except Exception as e:
-        logger.error(f"Error running migrations: {str(e)}")
-    
-    # Always show all default services in dropdown
-    default_services = [
-        'Interior design consultation',
-        'Custom eco-friendly furniture',
-        'Renovation with sustainable materials',
-        'Green spaces and indoor plants'
-    ]
-    
-    # Get unique services from database and combine with defaults
-    unique_services = default_services.copy()  # Start with defaults
-    try:
-        db_services = list(Consultation.objects.values_list('service', flat=True).distinct().order_by('service'))
-        # Add any additional services from database that aren't in defaults
-        for service in db_services:
-            if service and service not in unique_services:
-                unique_services.append(service)
-    except Exception as e:
-        logger.error(f"Error getting unique services from database: {str(e)}")
-        # Use defaults if database query fails
-        unique_services = default_services
+    # Services for the dropdown, cached
+    unique_services = get_service_catalogue()
     
     return render(request, 'main/create_consultation.html', {
         'unique_services': unique_services
@@ -508,7 +452,10 @@ def edit_consultation(request, id):
             consultation.name = request.POST.get('name', '').strip()
             consultation.email = request.POST.get('email', '').strip()
             consultation.phone = request.POST.get('phone', '').strip()
-            consultation.service = request.POST.get('service', '').strip()
+            service = lookup_service(request.POST.get('service', ''))
+            if service is None:
+                raise ValidationError("Please select a valid service")
+            consultation.service = service
             appointment_date = request.POST.get('appointment_date', '').strip()
             
             if appointment_date:
@@ -534,7 +481,8 @@ def edit_consultation(request, id):
                 messages.error(request, f'Error: {str(e)}')
     
     return render(request, 'main/edit_consultation.html', {
-        'consultation': consultation
+        'consultation': consultation,
+        'unique_services': get_service_catalogue(),
     })
 
 def delete_consultation(request, id):
@@ -584,28 +532,37 @@ def delete_consultation(request, id):
         return HttpResponseNotFound("Consultation not found")
 
 
+@rate_limit('chat', rate='30/m', burst=10)
 def chat_ai(request):
-    """AI Chat endpoint to handle interior design queries"""
+    """AI Chat endpoint to handle interior design queries
+
+    Answers are served from pre-encoded bytes cached per normalised message,
+    so a repeated question costs neither string building nor JSON encoding.
+    Clients sending ``Accept: text/event-stream`` get the answer as
+    server-sent events. Messages are only accepted in a POST body, as
+    visitors type phone numbers and emails into the chat.
+    """
     if request.method != 'POST':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
     import json
-    import re
     
     try:
         data = json.loads(request.body)
-        user_message = data.get('message', '').lower().strip()
+        user_message = normalize_message(data.get('message', ''))
         
         if not user_message:
             return JsonResponse({'error': 'Message is required'}, status=400)
         
-        # AI Response Logic
-        response = generate_ai_response(user_message)
+        # Clients that accept an event stream get the answer line by line
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            response = StreamingHttpResponse(encoded_stream(user_message), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
         
-        return JsonResponse({
-            'response': response,
-            'success': True
-        })
+        # AI Response Logic
+        return HttpResponse(encoded_response(user_message), content_type='application/json')
     except Exception as e:
         return JsonResponse({
             'error': str(e),
@@ -613,101 +570,6 @@ def chat_ai(request):
         }, status=500)
 
 
-def generate_ai_response(user_message):
-    """Generate AI response based on user query"""
-    # Keywords for different query types
-    eco_materials_keywords = ['material', 'eco', 'sustainable', 'green', 'environment', 'recycled', 'bamboo', 'cork', 'wood', 'furniture']
-    services_keywords = ['service', 'what do you', 'offer', 'provide', 'help', 'can you', 'do you']
-    booking_keywords = ['book', 'consultation', 'appointment', 'schedule', 'meeting', 'available']
-    design_keywords = ['design', 'interior', 'decor', 'style', 'color', 'room', 'space', 'layout', 'furniture', 'arrangement']
-    greeting_keywords = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']
-    
-    # Check for greetings
-    if any(keyword in user_message for keyword in greeting_keywords):
-        return "Hello! I'm your virtual design assistant at EcoNest Interiors. I can help you with interior design queries, suggest eco-friendly materials, explain our services, and guide you to book a consultation. How can I assist you today?"
-    
-    # Check for eco-friendly materials queries
-    if any(keyword in user_message for keyword in eco_materials_keywords):
-        return """Great question! Here are some excellent eco-friendly materials we recommend:
-
-🌿 **Sustainable Flooring:**
-- Bamboo (fast-growing, renewable)
-- Cork (harvested without harming trees)
-- Reclaimed wood (recycled from old structures)
-- Linoleum (made from natural materials)
-
-🪑 **Eco-Friendly Furniture:**
-- FSC-certified wood (sustainably sourced)
-- Recycled metal furniture
-- Furniture made from reclaimed materials
-- Natural fiber upholstery (organic cotton, hemp, jute)
-
-🎨 **Sustainable Paints & Finishes:**
-- Low-VOC or zero-VOC paints
-- Natural clay paints
-- Milk paint (non-toxic, biodegradable)
-
-Would you like more details about any specific material, or would you like to book a consultation to discuss your project?"""
-    
-    # Check for services queries
-    if any(keyword in user_message for keyword in services_keywords):
-        return """We offer comprehensive eco-friendly interior design services:
-
-✨ **Interior Design Consultation**
-Personalized sessions to align your home with sustainable living principles.
-
-🪑 **Custom Eco-Friendly Furniture**
-Handcrafted pieces using sustainable materials and finishes, tailored to your space.
-
-🏠 **Renovation with Sustainable Materials**
-Upgrade your home with eco-friendly flooring, paints, and fixtures.
-
-🌱 **Green Spaces & Indoor Plants**
-Enhancing interiors with biophilic designs and indoor gardens for better air quality.
-
-Would you like to learn more about any specific service, or book a consultation?"""
-    
-    # Check for booking queries
-    if any(keyword in user_message for keyword in booking_keywords):
-        return """I'd be happy to help you book a consultation! 
-
-To schedule your appointment, please:
-1. Visit our "Book Consultation" page (click the link in the navigation or chat)
-2. Fill out the form with your details
-3. Select your preferred service and date
-
-You can also call us at +91 6301739482 or email harshithatiruveedula@gmail.com
-
-Would you like me to guide you through the booking process?"""
-    
-    # Check for design queries
-    if any(keyword in user_message for keyword in design_keywords):
-        return """I'd love to help with your interior design questions! 
-
-Here are some sustainable design tips:
-- **Maximize Natural Light**: Reduces energy consumption and creates a welcoming atmosphere
-- **Choose Sustainable Materials**: Opt for bamboo, cork, reclaimed wood, and natural fibers
-- **Incorporate Plants**: Indoor plants improve air quality and add natural beauty
-- **Energy-Efficient Lighting**: Use LED bulbs and maximize daylight
-- **Multi-functional Furniture**: Reduces waste and maximizes space efficiency
-
-For personalized design advice tailored to your specific space and needs, I recommend booking a consultation with our design experts. Would you like to schedule one?"""
-    
-    # Default response
-    return """I'm here to help you with:
-- Interior design advice and tips
-- Eco-friendly material suggestions
-- Information about our services
-- Booking consultations
-
-Could you please rephrase your question? Or feel free to ask about:
-- "What eco-friendly materials do you recommend?"
-- "What services do you offer?"
-- "How can I book a consultation?"
-- "Design tips for my home"
-
-I'm here to assist you! 😊"""
-
 from django.contrib.auth.models import User
 from django.http import HttpResponse
 